@@ -0,0 +1,3 @@
+ALTER TABLE "user"
+    ADD COLUMN IF NOT EXISTS last_login_at TIMESTAMP WITH TIME ZONE,
+    ADD COLUMN IF NOT EXISTS login_count INTEGER NOT NULL DEFAULT 0;
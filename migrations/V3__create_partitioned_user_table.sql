@@ -0,0 +1,81 @@
+-- Hash-partitioned replacement for "user", filled online:
+--   1. this migration creates the partitioned table, the username -> id map
+--      and a trigger mirroring every write on "user" into the new layout;
+--   2. scripts/migrate_user_partitions.py backfills existing rows in batches;
+--   3. the same script's --cutover step swaps the tables inside one transaction.
+
+CREATE TABLE IF NOT EXISTS user_partitioned (
+    id UUID NOT NULL,
+    username VARCHAR(255) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    last_login_at TIMESTAMP WITH TIME ZONE,
+    login_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (id)
+) PARTITION BY HASH (id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS user_partitioned_p%s PARTITION OF user_partitioned '
+            'FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+            lpad(i::text, 2, '0'), i
+        );
+    END LOOP;
+END $$;
+
+-- A unique index on a hash-partitioned table must include the partition key,
+-- so global username uniqueness and username lookups go through this map.
+CREATE TABLE IF NOT EXISTS user_username (
+    username VARCHAR(255) PRIMARY KEY,
+    user_id UUID NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_username_user_id ON user_username(user_id);
+
+CREATE OR REPLACE FUNCTION sync_user_username() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id);
+    ELSIF TG_OP = 'UPDATE' AND NEW.username IS DISTINCT FROM OLD.username THEN
+        UPDATE user_username SET username = NEW.username WHERE user_id = OLD.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        DELETE FROM user_username WHERE user_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_user_partitioned_username
+    AFTER INSERT OR UPDATE OF username OR DELETE ON user_partitioned
+    FOR EACH ROW EXECUTE FUNCTION sync_user_username();
+
+CREATE OR REPLACE FUNCTION mirror_user_to_partitioned() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM user_partitioned WHERE id = OLD.id;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO user_partitioned (
+        id, username, password_hash, created_at, updated_at, last_login_at, login_count
+    ) VALUES (
+        NEW.id, NEW.username, NEW.password_hash, NEW.created_at, NEW.updated_at,
+        NEW.last_login_at, NEW.login_count
+    )
+    ON CONFLICT (id) DO UPDATE SET
+        username = EXCLUDED.username,
+        password_hash = EXCLUDED.password_hash,
+        created_at = EXCLUDED.created_at,
+        updated_at = EXCLUDED.updated_at,
+        last_login_at = EXCLUDED.last_login_at,
+        login_count = EXCLUDED.login_count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_user_mirror_partitioned
+    AFTER INSERT OR UPDATE OR DELETE ON "user"
+    FOR EACH ROW EXECUTE FUNCTION mirror_user_to_partitioned();
@@ -0,0 +1,13 @@
+-- Covering index for the login/auth path: username lookups read id,
+-- password_hash and the timestamps straight from the index (index-only scan)
+-- instead of visiting the heap. last_login_at / login_count are left out on
+-- purpose: they change on every activity flush and would turn those updates
+-- into non-HOT updates of this index.
+--
+-- Both statements are non-transactional; Flyway runs them outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_username_auth
+    ON "user" (username)
+    INCLUDE (id, password_hash, created_at, updated_at);
+
+-- idx_user_username is a prefix of the covering index and now redundant.
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_username;
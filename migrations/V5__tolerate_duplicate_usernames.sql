@@ -0,0 +1,22 @@
+-- V1 never made usernames unique and registration checks before it inserts,
+-- so "user" can already hold duplicate usernames. With V3's map insert, any
+-- write mirrored for such a row (including a whole record_logins batch) and
+-- the backfill failed on user_username's primary key. The first row to claim
+-- a name keeps the mapping; scripts/migrate_user_partitions.py --cutover
+-- refuses to swap tables until the duplicates are resolved. Renames stay
+-- strict: renaming onto a taken name still fails.
+
+CREATE OR REPLACE FUNCTION sync_user_username() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id)
+        ON CONFLICT (username) DO NOTHING;
+    ELSIF TG_OP = 'UPDATE' AND NEW.username IS DISTINCT FROM OLD.username THEN
+        DELETE FROM user_username WHERE user_id = OLD.id;
+        INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id);
+    ELSIF TG_OP = 'DELETE' THEN
+        DELETE FROM user_username WHERE user_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
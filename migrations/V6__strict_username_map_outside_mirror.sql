@@ -0,0 +1,58 @@
+-- V5 made every insert into user_username skip a taken name, but the trigger
+-- outlives the cutover: once the partitioned table is "user", two concurrent
+-- registrations of one name would both succeed and the second account would
+-- have no mapping. Duplicates are only tolerated while a row is copied from
+-- the old table, by the mirror trigger or the backfill, which set
+-- user_partitions.mirroring for the statement. Every other write is strict.
+
+CREATE OR REPLACE FUNCTION sync_user_username() RETURNS trigger AS $$
+DECLARE
+    mirroring boolean := coalesce(current_setting('user_partitions.mirroring', true), '') = 'on';
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF mirroring THEN
+            INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id)
+            ON CONFLICT (username) DO NOTHING;
+        ELSE
+            INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id);
+        END IF;
+    ELSIF TG_OP = 'UPDATE' AND NEW.username IS DISTINCT FROM OLD.username THEN
+        DELETE FROM user_username WHERE user_id = OLD.id;
+        IF mirroring THEN
+            INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id)
+            ON CONFLICT (username) DO NOTHING;
+        ELSE
+            INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id);
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        DELETE FROM user_username WHERE user_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mirror_user_to_partitioned() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM user_partitioned WHERE id = OLD.id;
+        RETURN NULL;
+    END IF;
+
+    PERFORM set_config('user_partitions.mirroring', 'on', true);
+    INSERT INTO user_partitioned (
+        id, username, password_hash, created_at, updated_at, last_login_at, login_count
+    ) VALUES (
+        NEW.id, NEW.username, NEW.password_hash, NEW.created_at, NEW.updated_at,
+        NEW.last_login_at, NEW.login_count
+    )
+    ON CONFLICT (id) DO UPDATE SET
+        username = EXCLUDED.username,
+        password_hash = EXCLUDED.password_hash,
+        created_at = EXCLUDED.created_at,
+        updated_at = EXCLUDED.updated_at,
+        last_login_at = EXCLUDED.last_login_at,
+        login_count = EXCLUDED.login_count;
+    PERFORM set_config('user_partitions.mirroring', 'off', true);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
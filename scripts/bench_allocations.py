@@ -0,0 +1,165 @@
+"""
+Per-endpoint allocation benchmark for the request hot path.
+
+    python -m scripts.bench_allocations --requests 2000
+
+Drives the ASGI app in-process (no HTTP client, no server) through endpoints
+that need no database: token verification, authentication failures and a
+profile read served from a pre-seeded principal cache. For each endpoint,
+tracemalloc reports the mean peak memory allocated while handling one
+request and the memory still held after the run. The same figures are then
+taken for the authentication service calls underneath those endpoints,
+where the framework's own allocations do not drown them out, and the size
+of a held failure ``Result``. DATABASE_URL
+must be set but is never connected to.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from main import app
+from src.db.models import User
+from src.routes.dependencies import auth_service
+from src.services.status import InternalStatus, Result
+
+
+def make_scope(method: str, path: str, headers: dict[str, str]) -> dict[str, Any]:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def call(method: str, path: str, headers: dict[str, str]) -> int:
+    status = 0
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(make_scope(method, path, headers), receive, send)
+    return status
+
+
+async def measure(name: str, method: str, path: str, headers: dict[str, str], requests: int) -> None:
+    for _ in range(min(200, requests)):
+        status = await call(method, path, headers)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    peaks = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await call(method, path, headers)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - before
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<28} {status:>6} {peaks / requests / 1024:>12.1f} "
+        f"{(retained - baseline) / 1024:>12.1f} {elapsed / requests * 1e6:>10.0f}"
+    )
+
+
+def measure_call(name: str, fn: Callable[[], Any], calls: int) -> None:
+    for _ in range(min(200, calls)):
+        fn()
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    peaks = 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - before
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<28} {'':>6} {peaks / calls / 1024:>12.2f} "
+        f"{(retained - baseline) / 1024:>12.1f} {elapsed / calls * 1e6:>10.1f}"
+    )
+
+
+def measure_results(count: int) -> None:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    held = [
+        Result.failure(InternalStatus.USER_NOT_FOUND, "User not found")
+        for _ in range(count)
+    ]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\nheld failure Result: {(after - before) / len(held):.0f} bytes each")
+
+
+async def run(requests: int) -> None:
+    user = User(
+        id=uuid.uuid4(),
+        username="bench_user",
+        password_hash="x" * 60,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+    )
+    auth_service.principal_cache.ttl_seconds = 3600
+    auth_service.principal_cache.set(user.username, user)
+    token = auth_service.create_jwt_token(user.username)
+    bearer = {"Authorization": f"Bearer {token}"}
+    bad_bearer = {"Authorization": "Bearer not-a-token"}
+
+    print(f"{'endpoint':<28} {'status':>6} {'peak KiB/req':>12} {'retained KiB':>12} {'µs/req':>10}")
+    await measure("POST /auth/verify", "POST", "/auth/verify", bearer, requests)
+    await measure("POST /auth/verify (invalid)", "POST", "/auth/verify", bad_bearer, requests)
+    await measure("GET /users/me (cached)", "GET", "/users/me", bearer, requests)
+    await measure("GET /users/me (invalid)", "GET", "/users/me", bad_bearer, requests)
+    await measure("GET /health/ready", "GET", "/health/ready", {}, requests)
+
+    print(f"\n{'service call':<28} {'':>6} {'peak KiB/call':>12} {'retained KiB':>12} {'µs/call':>10}")
+    measure_call("get_jwt_username", lambda: auth_service.get_jwt_username(token), requests)
+    measure_call(
+        "get_jwt_username (invalid)",
+        lambda: auth_service.get_jwt_username("not-a-token"),
+        requests,
+    )
+    measure_call("get_user_from_token", lambda: auth_service.get_user_from_token(token), requests)
+    measure_call(
+        "create_jwt_token", lambda: auth_service.create_jwt_token(user.username), requests
+    )
+    measure_results(requests)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    asyncio.run(run(parser.parse_args().requests))
+
+
+if __name__ == "__main__":
+    main()
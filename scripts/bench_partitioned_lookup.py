@@ -0,0 +1,128 @@
+"""
+Lookup latency of the single-table and hash-partitioned user layouts.
+
+    python -m scripts.bench_partitioned_lookup --rows 1000000 10000000
+
+Runs against DATABASE_URL, which should point at a scratch database: the
+benchmark creates and drops its own ``bench_*`` tables and never touches
+"user". For each row count both layouts are seeded server-side, then timed
+on random id lookups and random username lookups.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+
+from src.settings import DatabaseSettings
+
+
+PARTITIONS = 16
+
+SETUP = [
+    "DROP TABLE IF EXISTS bench_user_single, bench_user_hash, bench_user_username",
+    """
+    CREATE TABLE bench_user_single (
+        id UUID PRIMARY KEY,
+        username VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE,
+        updated_at TIMESTAMP WITH TIME ZONE
+    )
+    """,
+    "CREATE INDEX ON bench_user_single(username)",
+    """
+    CREATE TABLE bench_user_hash (
+        id UUID NOT NULL,
+        username VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE,
+        updated_at TIMESTAMP WITH TIME ZONE,
+        PRIMARY KEY (id)
+    ) PARTITION BY HASH (id)
+    """,
+    *[
+        f"CREATE TABLE bench_user_hash_p{i:02d} PARTITION OF bench_user_hash "
+        f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})"
+        for i in range(PARTITIONS)
+    ],
+    "CREATE TABLE bench_user_username (username VARCHAR(255) PRIMARY KEY, user_id UUID NOT NULL)",
+]
+
+SEED = [
+    """
+    INSERT INTO bench_user_single
+    SELECT md5(i::text)::uuid, 'user_' || i, 'x', now(), now()
+    FROM generate_series(1, :rows) AS i
+    """,
+    "INSERT INTO bench_user_hash SELECT * FROM bench_user_single",
+    "INSERT INTO bench_user_username SELECT username, id FROM bench_user_single",
+    "ANALYZE bench_user_single",
+    "ANALYZE bench_user_hash",
+    "ANALYZE bench_user_username",
+]
+
+QUERIES = {
+    "single/id": "SELECT * FROM bench_user_single WHERE id = md5(:n)::uuid",
+    "single/username": "SELECT * FROM bench_user_single WHERE username = 'user_' || :n",
+    "hash/id": "SELECT * FROM bench_user_hash WHERE id = md5(:n)::uuid",
+    "hash/username": (
+        "SELECT u.* FROM bench_user_hash u "
+        "JOIN bench_user_username m ON m.user_id = u.id "
+        "WHERE m.username = 'user_' || :n"
+    ),
+}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def time_query(conn: Connection, sql: str, rows: int, lookups: int) -> list[float]:
+    statement = text(sql)
+    samples = []
+    for _ in range(lookups):
+        n = str(random.randint(1, rows))
+        started = time.perf_counter()
+        conn.execute(statement, {"n": n}).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return sorted(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="keep the bench tables")
+    args = parser.parse_args()
+
+    engine = create_engine(DatabaseSettings().DATABASE_URL)  # type: ignore
+
+    print(f"{'rows':>10} {'query':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for rows in args.rows:
+        with engine.begin() as conn:
+            for statement in SETUP:
+                conn.execute(text(statement))
+            for statement in SEED:
+                conn.execute(text(statement), {"rows": rows})
+
+        with engine.connect() as conn:
+            for name, sql in QUERIES.items():
+                time_query(conn, sql, rows, min(500, args.lookups))  # warm-up
+                samples = time_query(conn, sql, rows, args.lookups)
+                print(
+                    f"{rows:>10} {name:<16} {percentile(samples, 0.50):>8.3f} "
+                    f"{percentile(samples, 0.95):>8.3f} {percentile(samples, 0.99):>8.3f} "
+                    f"{statistics.fmean(samples):>8.3f}"
+                )
+
+    if not args.keep:
+        with engine.begin() as conn:
+            conn.execute(text(SETUP[0]))
+
+
+if __name__ == "__main__":
+    main()
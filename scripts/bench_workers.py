@@ -0,0 +1,131 @@
+"""
+Requests per second as the number of server workers grows.
+
+    python -m scripts.bench_workers --workers 1 2 4 --duration 10 --concurrency 64
+
+For each worker count, starts ``python -m src.server`` with that
+WEB_CONCURRENCY on a local port and waits for /health/ready. It then drives
+POST /auth/verify with a valid token for ``--duration`` seconds from
+``--client-processes`` load generators and reports throughput and latency
+percentiles. Token verification needs no database round trip, so this
+measures how request handling scales across cores. The server still needs
+its usual settings (SECRET_KEY, DATABASE_URL, ...) in the environment.
+Clients share the machine with the server; on small boxes give them fewer
+processes than there are cores, or run the load from elsewhere.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from src.db import init_database
+from src.services.auth import AuthenticationService
+from src.settings import DatabaseSettings
+
+
+def make_token() -> str:
+    """A token the server accepts, signed by its key ring when JWT_KEYRING_FILE is set."""
+    # the service's repositories need an engine, but minting never connects
+    init_database(DatabaseSettings().DATABASE_URL)  # type: ignore
+    return AuthenticationService().create_jwt_token("bench_user")
+
+
+async def drive(url: str, token: str, concurrency: int, duration: float) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, headers=headers)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def load_process(args: tuple[str, str, int, float]) -> tuple[list[float], int]:
+    return asyncio.run(drive(*args))
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health/ready", timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+def bench(workers: int, args: argparse.Namespace, token: str) -> None:
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "SERVER_PORT": str(args.port)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base_url, server)
+        per_process = max(1, args.concurrency // args.client_processes)
+        jobs = [(f"{base_url}/auth/verify", token, per_process, args.duration)] * args.client_processes
+        with multiprocessing.Pool(args.client_processes) as pool:
+            results = pool.map(load_process, jobs)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    if not latencies:
+        print(f"{workers:>7} {'-':>10} {'-':>9} {'-':>9} {errors:>7}")
+        return
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{workers:>7} {len(latencies) / args.duration:>10.0f} "
+        f"{statistics.median(latencies) * 1000:>9.1f} {p99 * 1000:>9.1f} {errors:>7}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--client-processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--port", type=int, default=8077)
+    args = parser.parse_args()
+
+    token = make_token()
+    print(f"{'workers':>7} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for workers in args.workers:
+        bench(workers, args, token)
+
+
+if __name__ == "__main__":
+    main()
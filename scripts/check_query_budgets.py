@@ -0,0 +1,83 @@
+"""
+Exercise every budgeted route and fail if any runs more SQL statements than
+allowed by QUERY_BUDGETS.
+
+    python -m scripts.check_query_budgets
+
+Runs the app in-process against DATABASE_URL (a seeded local Postgres) with the
+X-DB-Query-Count header enabled, using a throwaway user that is deleted at
+the end. Exits non-zero when a budget is exceeded.
+
+tests/test_query_budgets.py runs the same routes in CI against SQLite; this
+script is the Postgres check, including the Postgres-only batch lookup and
+the pg_notify of the invalidation transport.
+"""
+
+import os
+import sys
+import uuid
+
+os.environ["DB_QUERY_COUNT_HEADER"] = "true"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+from src.db import get_database  # noqa: E402
+from src.middleware import QUERY_BUDGETS  # noqa: E402
+
+
+def main() -> int:
+    # dialect initialisation runs its own statements on the first connect
+    with get_database().engine.connect():
+        pass
+
+    client = TestClient(app)
+    username = f"budget_{uuid.uuid4().hex[:12]}"
+    password = "budget-check-password"
+    observed: dict[tuple[str, str], int] = {}
+
+    def call(method: str, path: str, **kwargs):
+        response = client.request(method, path, **kwargs)
+        statements = int(response.headers["x-db-query-count"].split(";")[0])
+        observed[(method, path)] = statements
+        return response
+
+    call("POST", "/users/register", json={"username": username, "password": password})
+    token = call(
+        "POST", "/auth/token", data={"username": username, "password": password}
+    ).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    call("POST", "/auth/verify", headers=auth)
+    call("POST", "/auth/refresh", headers=auth)
+    me = call("GET", "/users/me", headers=auth).json()
+    call(
+        "POST",
+        "/users/batch",
+        headers=auth,
+        json={"ids": [me["id"], str(uuid.uuid4())], "usernames": [username, "missing"]},
+    )
+    call(
+        "PUT",
+        "/users/me/password",
+        headers=auth,
+        json={"old_password": password, "new_password": password + "!"},
+    )
+    call("GET", "/health/ready")
+    call("DELETE", "/users/me", headers=auth)
+
+    failed = False
+    for route, budget in QUERY_BUDGETS.items():
+        if route not in observed:
+            print(f"SKIP {route[0]} {route[1]}: not exercised")
+            continue
+        statements = observed[route]
+        ok = statements <= budget
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {route[0]} {route[1]}: {statements}/{budget}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Check the query plans of every UserRepository query.
+
+    python -m scripts.check_query_plans --rows 100000
+
+Seeds synthetic users into DATABASE_URL (a local Postgres with the Flyway
+migrations applied), runs ``VACUUM ANALYZE``, and calls each repository
+method. Every statement the method sends is first run as
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` inside a savepoint that is rolled
+back. The check fails when a statement does not use its intended index,
+falls back to a sequential scan, or touches more shared buffers than its
+budget. Seeded rows are removed at the end.
+
+Heap fetches of index-only scans are reported, not checked: the credential
+lookup is repeated after ``record_logins`` to show that a login clears the
+page's all-visible bit, so recently active users are read from the heap
+until the next vacuum.
+
+Only the single-table layout is supported. After the partition cutover
+(``scripts.migrate_user_partitions``) the expectations below no longer
+apply, and the script refuses to run.
+"""
+
+import argparse
+import sys
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Generator, Iterator
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from src.db import get_database, init_database
+from src.db.models import User
+from src.repositories import UserRepository
+from src.settings import DatabaseSettings
+
+
+SEED_PREFIX = "plancheck_"
+
+
+@dataclass(frozen=True)
+class PlanExpectation:
+    index: str | None
+    max_buffers: int | None
+    index_only: bool = False
+    allow_seq_scan: bool = False
+
+
+POINT_READ = PlanExpectation(index="user_pkey", max_buffers=8)
+USERNAME_READ = PlanExpectation(index="idx_user_username_auth", max_buffers=8)
+AUTH_READ = PlanExpectation(index="idx_user_username_auth", max_buffers=8, index_only=True)
+WRITE = PlanExpectation(index="user_pkey", max_buffers=32)
+
+
+@dataclass(frozen=True)
+class Sample:
+    first: User
+    second: User
+
+
+PLAN_CHECKS: list[tuple[str, Callable[[UserRepository, Sample], Any], PlanExpectation]] = [
+    ("get_by_id", lambda repo, s: repo.get_by_id(str(s.first.id)), POINT_READ),
+    ("get_by_username", lambda repo, s: repo.get_by_username(s.first.username), USERNAME_READ),
+    (
+        "get_credentials_by_username",
+        lambda repo, s: repo.get_credentials_by_username(s.first.username),
+        AUTH_READ,
+    ),
+    ("exists", lambda repo, s: repo.exists(s.first.username), AUTH_READ),
+    (
+        "get_many_by_ids",
+        lambda repo, s: repo.get_many_by_ids([str(s.first.id), str(s.second.id), str(uuid.uuid4())]),
+        PlanExpectation(index="user_pkey", max_buffers=24),
+    ),
+    (
+        "get_many_by_usernames",
+        lambda repo, s: repo.get_many_by_usernames([s.first.username, s.second.username, "missing"]),
+        PlanExpectation(index="idx_user_username_auth", max_buffers=24),
+    ),
+    (
+        "get_all",
+        lambda repo, s: repo.get_all(),
+        PlanExpectation(index=None, max_buffers=None, allow_seq_scan=True),
+    ),
+    (
+        "create",
+        lambda repo, s: repo.create(
+            User(
+                id=uuid.uuid4(),
+                username=f"{SEED_PREFIX}created",
+                password_hash="x" * 60,
+                created_at=datetime.now(timezone.utc),
+                updated_at=datetime.now(timezone.utc),
+            )
+        ),
+        PlanExpectation(index=None, max_buffers=32),
+    ),
+    (
+        "update",
+        lambda repo, s: repo.update(str(s.first.id), updated_at=datetime.now(timezone.utc)),
+        WRITE,
+    ),
+    (
+        "update_password",
+        lambda repo, s: repo.update_password(
+            str(s.first.id), "y" * 60, updated_at=datetime.now(timezone.utc)
+        ),
+        WRITE,
+    ),
+    (
+        "record_logins",
+        lambda repo, s: repo.record_logins([(s.first.id, datetime.now(timezone.utc), 1)]),
+        WRITE,
+    ),
+    # same lookup again, now that the login above has touched the first user's heap page
+    (
+        "get_credentials_by_username",
+        lambda repo, s: repo.get_credentials_by_username(s.first.username),
+        AUTH_READ,
+    ),
+    ("delete", lambda repo, s: repo.delete(str(s.second.id)), WRITE),
+    # full scans by design: the username index's seed count and rebuild stream
+    (
+        "count",
+        lambda repo, s: repo.count(),
+        PlanExpectation(index=None, max_buffers=None, allow_seq_scan=True),
+    ),
+    (
+        "iter_usernames",
+        lambda repo, s: sum(1 for _ in repo.iter_usernames()),
+        PlanExpectation(index=None, max_buffers=None, allow_seq_scan=True),
+    ),
+]
+
+
+def walk(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+@contextmanager
+def capture_plans(*engines: Engine) -> Generator[list[tuple[str, dict[str, Any]]], None, None]:
+    plans: list[tuple[str, dict[str, Any]]] = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            return
+        # a plain cursor: streamed statements arrive on a server-side one
+        plain = conn.connection.cursor()
+        plain.execute("SAVEPOINT plan_check")
+        plain.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+        plans.append((statement, plain.fetchone()[0][0]["Plan"]))
+        plain.execute("ROLLBACK TO SAVEPOINT plan_check")
+        plain.close()
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", explain)
+    try:
+        yield plans
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", explain)
+
+
+def check_plan(plan: dict[str, Any], expected: PlanExpectation) -> list[str]:
+    nodes = list(walk(plan))
+    problems = []
+
+    if not expected.allow_seq_scan and any(
+        node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "user" for node in nodes
+    ):
+        problems.append('sequential scan on "user"')
+
+    if expected.index is not None:
+        scans = [node for node in nodes if node.get("Index Name") == expected.index]
+        if not scans:
+            used = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+            problems.append(f"expected {expected.index}, used {used or 'no index'}")
+        elif expected.index_only and not any(
+            node["Node Type"] == "Index Only Scan" for node in scans
+        ):
+            problems.append(f"{expected.index} used without an index-only scan")
+
+    buffers = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+    if expected.max_buffers is not None and buffers > expected.max_buffers:
+        problems.append(f"{buffers} shared buffers (budget {expected.max_buffers})")
+
+    return problems
+
+
+def heap_fetches(plan: dict[str, Any]) -> int | None:
+    scans = [node for node in walk(plan) if node["Node Type"] == "Index Only Scan"]
+    if not scans:
+        return None
+    return sum(node.get("Heap Fetches", 0) for node in scans)
+
+
+def is_partitioned(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        relkind = conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = '\"user\"'::regclass")
+        ).scalar_one()
+    return relkind == "p"
+
+
+def seed(engine: Engine, rows: int) -> Sample:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO "user" (id, username, password_hash, created_at, updated_at)
+                SELECT md5(:prefix || i)::uuid, :prefix || i, repeat('x', 60), now(), now()
+                FROM generate_series(1, :rows) AS i
+                """
+            ),
+            {"prefix": SEED_PREFIX, "rows": rows},
+        )
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text('VACUUM ANALYZE "user"'))
+
+    repo = UserRepository()
+    first = repo.get_by_username(f"{SEED_PREFIX}{rows // 3}")
+    second = repo.get_by_username(f"{SEED_PREFIX}{2 * rows // 3}")
+    assert first is not None and second is not None
+    return Sample(first, second)
+
+
+def cleanup(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text('DELETE FROM "user" WHERE username LIKE :pattern'),
+            {"pattern": SEED_PREFIX.replace("_", r"\_") + "%"},
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    init_database(DatabaseSettings().DATABASE_URL)  # type: ignore
+    engine = get_database().engine
+    if is_partitioned(engine):
+        print('"user" is partitioned; only the single-table layout can be checked')
+        return 2
+    repo = UserRepository(partitioned=False)
+
+    failed = False
+    try:
+        sample = seed(engine, args.rows)
+        for name, call, expected in PLAN_CHECKS:
+            with capture_plans(engine, get_database().dedicated_engine) as plans:
+                call(repo, sample)
+            for statement, plan in plans:
+                problems = check_plan(plan, expected)
+                failed |= bool(problems)
+                buffers = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+                fetches = heap_fetches(plan)
+                heap = f"{fetches:>3} heap" if fetches is not None else " " * 8
+                summary = " ".join(statement.split())[:72]
+                print(
+                    f"{'FAIL' if problems else 'OK  '} {name:<28} {buffers:>5} buf {heap}  {summary}"
+                )
+                for problem in problems:
+                    print(f"       - {problem}")
+    finally:
+        if not args.keep:
+            cleanup(engine)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
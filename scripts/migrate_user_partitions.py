@@ -0,0 +1,206 @@
+"""
+Online migration of "user" into the hash-partitioned layout created by
+V3__create_partitioned_user_table.sql.
+
+    python -m scripts.migrate_user_partitions --batch-size 5000
+    python -m scripts.migrate_user_partitions --cutover
+
+The backfill copies rows in id order, one short transaction per batch, and can
+be stopped and resumed at any point; the V3 mirror trigger keeps rows written
+meanwhile in sync. ``--cutover`` reconciles both tables under a lock and swaps
+them; set ``USER_TABLE_PARTITIONED=true`` afterwards.
+
+The covering index from V4 (idx_user_username_auth) stays behind on
+user_unpartitioned. Partitioned username lookups resolve the id through
+user_username instead, so before taking the lock ``--cutover`` builds
+idx_user_auth_by_id, ``(id) INCLUDE`` the same columns, one partition at a
+time: a plain CREATE INDEX blocks writes to that partition only, and
+CONCURRENTLY is not supported on a partitioned parent. The per-partition
+indexes are then attached to an index created ``ON ONLY`` the parent.
+
+Usernames were never unique in the old table. Rows sharing a name are copied,
+but only the first gets the username mapping, so the cutover refuses to run
+until duplicates are resolved; the backfill lists them up front. That
+tolerance only applies while copying (see V6); the cutover maps any row still
+unmapped and makes the username trigger strict again in the same transaction.
+"""
+
+import argparse
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.settings import DatabaseSettings
+
+
+COLUMNS = "id, username, password_hash, created_at, updated_at, last_login_at, login_count"
+
+BACKFILL_BATCH = text(
+    f"""
+    WITH batch AS (
+        SELECT {COLUMNS} FROM "user"
+        WHERE id > :after
+        ORDER BY id
+        LIMIT :batch_size
+    ), copied AS (
+        INSERT INTO user_partitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM batch
+        ON CONFLICT (id) DO NOTHING
+    )
+    SELECT count(*) AS rows, max(id::text) AS last_id FROM batch
+    """
+)
+
+# lets the V6 username trigger skip names already mapped, for this transaction only
+MIRRORING = text("SELECT set_config('user_partitions.mirroring', 'on', true)")
+
+DUPLICATE_USERNAMES = text(
+    """
+    SELECT username, count(*) AS copies FROM "user"
+    GROUP BY username HAVING count(*) > 1
+    ORDER BY username
+    LIMIT :limit
+    """
+)
+
+LOCK_SOURCE = 'LOCK TABLE "user" IN EXCLUSIVE MODE'
+
+AUTH_INDEX = "idx_user_auth_by_id"
+AUTH_INDEX_COLUMNS = "(id) INCLUDE (username, password_hash, created_at, updated_at)"
+
+PARTITIONS = text(
+    """
+    SELECT c.relname FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'user_partitioned'::regclass
+    ORDER BY c.relname
+    """
+)
+
+CUTOVER = [
+    # rows deleted from "user" while their batch was being copied
+    """
+    DELETE FROM user_partitioned p
+    WHERE NOT EXISTS (SELECT 1 FROM "user" u WHERE u.id = p.id)
+    """,
+    f"""
+    INSERT INTO user_partitioned ({COLUMNS})
+    SELECT {COLUMNS} FROM "user"
+    ON CONFLICT (id) DO NOTHING
+    """,
+    # rows whose name was mapped to a duplicate that has since been deleted
+    """
+    INSERT INTO user_username (username, user_id)
+    SELECT p.username, p.id FROM user_partitioned p
+    WHERE NOT EXISTS (SELECT 1 FROM user_username m WHERE m.user_id = p.id)
+    """,
+    'DROP TRIGGER trg_user_mirror_partitioned ON "user"',
+    # from now on user_username is what keeps usernames unique
+    """
+    CREATE OR REPLACE FUNCTION sync_user_username() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id);
+        ELSIF TG_OP = 'UPDATE' AND NEW.username IS DISTINCT FROM OLD.username THEN
+            DELETE FROM user_username WHERE user_id = OLD.id;
+            INSERT INTO user_username (username, user_id) VALUES (NEW.username, NEW.id);
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM user_username WHERE user_id = OLD.id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    'ALTER TABLE "user" RENAME TO user_unpartitioned',
+    'ALTER TABLE user_partitioned RENAME TO "user"',
+    "DROP FUNCTION mirror_user_to_partitioned()",
+]
+
+
+def find_duplicate_usernames(conn: Connection, limit: int = 50) -> list[tuple[str, int]]:
+    return [(row.username, row.copies) for row in conn.execute(DUPLICATE_USERNAMES, {"limit": limit})]
+
+
+def report_duplicates(duplicates: list[tuple[str, int]]) -> None:
+    print(f"{len(duplicates)} duplicated username(s) (first 50 shown):", file=sys.stderr)
+    for username, copies in duplicates:
+        print(f"  {username!r}: {copies} rows", file=sys.stderr)
+
+
+def backfill(engine: Engine, batch_size: int, pause: float) -> int:
+    with engine.connect() as conn:
+        duplicates = find_duplicate_usernames(conn)
+    if duplicates:
+        report_duplicates(duplicates)
+        print("resolve these before --cutover; only one row per name is mapped", file=sys.stderr)
+
+    after = "00000000-0000-0000-0000-000000000000"
+    total = 0
+
+    while True:
+        with engine.begin() as conn:
+            conn.execute(MIRRORING)
+            row = conn.execute(
+                BACKFILL_BATCH, {"after": after, "batch_size": batch_size}
+            ).one()
+
+        if not row.rows:
+            return total
+
+        total += row.rows
+        after = row.last_id
+        print(f"copied {total} rows (up to id {after})")
+        time.sleep(pause)
+
+
+def build_auth_index(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(f"CREATE INDEX IF NOT EXISTS {AUTH_INDEX} ON ONLY user_partitioned {AUTH_INDEX_COLUMNS}")
+        )
+        partitions = list(conn.execute(PARTITIONS).scalars())
+
+    for partition in partitions:
+        with engine.begin() as conn:
+            conn.execute(
+                text(f"CREATE INDEX IF NOT EXISTS {partition}_auth ON {partition} {AUTH_INDEX_COLUMNS}")
+            )
+            conn.execute(text(f"ALTER INDEX {AUTH_INDEX} ATTACH PARTITION {partition}_auth"))
+        print(f"indexed {partition}")
+
+
+def cutover(engine: Engine) -> None:
+    build_auth_index(engine)
+    with engine.begin() as conn:
+        conn.execute(text(LOCK_SOURCE))
+        duplicates = find_duplicate_usernames(conn)
+        if duplicates:
+            report_duplicates(duplicates)
+            raise SystemExit("cutover aborted: users sharing a name would lose username lookups")
+        for statement in CUTOVER:
+            conn.execute(text(statement))
+    print("cutover complete; set USER_TABLE_PARTITIONED=true")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--pause", type=float, default=0.05, help="seconds to sleep between batches"
+    )
+    parser.add_argument(
+        "--cutover", action="store_true", help="swap tables once the backfill is done"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(DatabaseSettings().DATABASE_URL)  # type: ignore
+    if args.cutover:
+        cutover(engine)
+    else:
+        backfill(engine, args.batch_size, args.pause)
+
+
+if __name__ == "__main__":
+    main()
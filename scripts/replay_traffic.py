@@ -0,0 +1,181 @@
+"""
+Replay traffic recorded by TrafficRecorderMiddleware against a target instance.
+
+    python -m scripts.replay_traffic traffic.ndjson --target http://localhost:8000 \\
+        --username replay_user --password replay-password --speed 10
+
+Each worker writes its own ``traffic.<pid>.ndjson``; giving the configured
+TRAFFIC_RECORD_PATH replays all of them, rotated backups included.
+
+Requests are re-issued with their recorded inter-arrival times divided by
+``--speed``. Recorded query strings and bodies only carry their shape, so
+values are synthesised: credentials come from the replay account (created on
+first use), password changes set the same password again, and registrations
+and availability checks use fresh random usernames. Account deletion is never replayed. At the end a
+per-route table compares recorded and replayed latency.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import secrets
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+
+SKIPPED_ROUTES = {("DELETE", "/users/me")}
+
+# routes whose username is a new one rather than the replay account's
+FRESH_USERNAME_ROUTES = {"/users/register", "/users/available"}
+
+
+def expand_logs(paths: list[str]) -> list[str]:
+    """
+    Resolve arguments to log files. Globs are expanded, and a recorder path
+    such as ``traffic.ndjson`` also picks up the per-worker files and their
+    rotated backups (``traffic.<pid>.ndjson``, ``traffic.<pid>.ndjson.1``, ...).
+    """
+    found: set[str] = set()
+    for path in paths:
+        found.update(glob.glob(path))
+        base = Path(path)
+        if not any(char in path for char in "*?["):
+            found.update(glob.glob(str(base.with_name(f"{base.stem}.*{base.suffix}*"))))
+    if not found:
+        raise SystemExit(f"no traffic logs match {' '.join(paths)}")
+    return sorted(found)
+
+
+def load_records(paths: list[str]) -> list[dict[str, Any]]:
+    records = []
+    for path in expand_logs(paths):
+        with Path(path).open() as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return sorted(records, key=lambda record: record["ts"])
+
+
+def synthesise(shape: Any, field: str | None, account: dict[str, str], route: str) -> Any:
+    """Build a value matching a recorded ``body_shape``."""
+    if isinstance(shape, dict):
+        if "list" in shape and "item" in shape:
+            return [synthesise(shape["item"], field, account, route) for _ in range(shape["list"])]
+        return {key: synthesise(value, key, account, route) for key, value in shape.items()}
+    if shape == "secret":
+        return account["password"]
+    if field == "username":
+        if route in FRESH_USERNAME_ROUTES:
+            return f"replay_{secrets.token_hex(8)}"
+        return account["username"]
+    if isinstance(shape, str) and shape.startswith("str:"):
+        return secrets.token_hex(max(1, int(shape[4:]) // 2 + 1))[: int(shape[4:])]
+    return {"int": 0, "float": 0.0, "bool": False, "null": None}.get(shape)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def login(client: httpx.AsyncClient, account: dict[str, str]) -> str:
+    await client.post("/users/register", json=account)
+    response = await client.post("/auth/token", data=account)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def replay(args: argparse.Namespace) -> int:
+    records = [
+        record
+        for record in load_records(args.logs)
+        if (record["method"], record["route"]) not in SKIPPED_ROUTES
+        and "{" not in record["route"]
+    ]
+    if not records:
+        print("no replayable records")
+        return 1
+
+    account = {"username": args.username, "password": args.password}
+    recorded: dict[tuple[str, str], list[float]] = defaultdict(list)
+    replayed: dict[tuple[str, str], list[float]] = defaultdict(list)
+    status_mismatches: dict[tuple[str, str], int] = defaultdict(int)
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout) as client:
+        token = await login(client, account)
+
+        async def issue(record: dict[str, Any]) -> None:
+            key = (record["method"], record["route"])
+            headers = {"Authorization": f"Bearer {token}"} if record["auth"] else {}
+            body = synthesise(record["body"], None, account, record["route"])
+            # records written before query shapes were captured have no "query"
+            kwargs: dict[str, Any] = {
+                "params": synthesise(record.get("query"), None, account, record["route"])
+            }
+            if record["content_type"] == "application/json":
+                kwargs["json"] = body
+            elif record["content_type"] == "application/x-www-form-urlencoded":
+                kwargs["data"] = body
+
+            async with limit:
+                started = time.perf_counter()
+                response = await client.request(
+                    record["method"], record["route"], headers=headers, **kwargs
+                )
+                replayed[key].append((time.perf_counter() - started) * 1000)
+            recorded[key].append(record["duration_ms"])
+            if response.status_code != record["status"]:
+                status_mismatches[key] += 1
+
+        origin = records[0]["ts"]
+        started = time.perf_counter()
+        tasks = []
+        for record in records:
+            delay = (record["ts"] - origin) / args.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(issue(record)))
+        await asyncio.gather(*tasks)
+
+    print(
+        f"{'route':<28} {'n':>6} {'rec p50':>8} {'rep p50':>8} {'Δp50':>8} "
+        f"{'rec p95':>8} {'rep p95':>8} {'Δp95':>8} {'status≠':>8}"
+    )
+    for key in sorted(replayed):
+        rec, rep = recorded[key], replayed[key]
+        rec50, rep50 = percentile(rec, 0.5), percentile(rep, 0.5)
+        rec95, rep95 = percentile(rec, 0.95), percentile(rep, 0.95)
+        print(
+            f"{key[0] + ' ' + key[1]:<28} {len(rep):>6} {rec50:>8.2f} {rep50:>8.2f} "
+            f"{rep50 - rec50:>+8.2f} {rec95:>8.2f} {rep95:>8.2f} {rep95 - rec95:>+8.2f} "
+            f"{status_mismatches[key]:>8}"
+        )
+    total = [sample for samples in replayed.values() for sample in samples]
+    print(f"replayed {len(total)} requests, mean {statistics.fmean(total):.2f} ms")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "logs",
+        nargs="+",
+        help="TRAFFIC_RECORD_PATH (per-worker files are found next to it) or NDJSON files/globs",
+    )
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = recorded pace")
+    parser.add_argument("--username", required=True, help="replay account on the target")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    sys.exit(asyncio.run(replay(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
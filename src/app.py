@@ -1,11 +1,120 @@
-from fastapi import FastAPI
-from src.routes import user_router
-from src.db import init_database
-from src.settings import DatabaseSettings
+from contextlib import asynccontextmanager
 
-#setup db manager and engine
+from anyio import to_thread
+from fastapi import FastAPI, Request
+from src.db import (
+    CircuitBreaker,
+    DatabaseUnavailableError,
+    get_database,
+    init_database,
+    install_query_counter,
+    worker_pool_size,
+)
+from src.settings import DatabaseSettings, ServerSettings, TrafficRecorderSettings
+
+#setup db manager and engine (before routes build their module-level services)
 db_settings = DatabaseSettings() #type: ignore
-init_database(db_settings.DATABASE_URL)
+server_settings = ServerSettings()
+# every worker process imports this module, so each takes its share of the budget
+pool_size = worker_pool_size(
+    db_settings.DB_CONNECTION_BUDGET,
+    server_settings.WEB_CONCURRENCY or 1,
+    reserved_per_worker=db_settings.reserved_connections_per_worker,
+)
+worker_threads = server_settings.WORKER_THREADS or 2 * pool_size
+init_database(
+    db_settings.DATABASE_URL,
+    circuit_breaker=CircuitBreaker(
+        failure_rate_threshold=db_settings.DB_BREAKER_FAILURE_RATE,
+        slow_checkout_seconds=db_settings.DB_BREAKER_SLOW_CHECKOUT_SECONDS,
+        open_seconds=db_settings.DB_BREAKER_OPEN_SECONDS,
+    ),
+    pool_timeout=db_settings.DB_POOL_TIMEOUT,
+    pool_size=pool_size,
+    max_overflow=0,
+)
+install_query_counter(get_database().engine)
+
+from src.routes import (  # noqa: E402
+    user_router,
+    auth_router,
+    well_known_router,
+    health_router,
+)
+from src.routes.dependencies import (  # noqa: E402
+    activity_recorder,
+    invalidation_bus,
+    username_index,
+    StatusFailure,
+    failure_response,
+)
+from src.middleware import (  # noqa: E402
+    LoadSheddingMiddleware,
+    QueryBudgetMiddleware,
+    TrafficRecorder,
+    TrafficRecorderMiddleware,
+)
+from src.services.status import InternalStatus  # noqa: E402
+
+traffic_settings = TrafficRecorderSettings()
+traffic_recorder = (
+    TrafficRecorder(
+        traffic_settings.TRAFFIC_RECORD_PATH,
+        sample_rate=traffic_settings.TRAFFIC_SAMPLE_RATE,
+        max_bytes=traffic_settings.TRAFFIC_RECORD_MAX_BYTES,
+        backup_count=traffic_settings.TRAFFIC_RECORD_BACKUPS,
+    )
+    if traffic_settings.TRAFFIC_RECORD_PATH
+    else None
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # sync endpoints run on this pool; threads beyond what the DB pool and
+    # password hashing can keep busy would only queue on pool checkout
+    to_thread.current_default_thread_limiter().total_tokens = worker_threads
+    activity_recorder.start()
+    invalidation_bus.start()
+    username_index.start()
+    if traffic_recorder is not None:
+        traffic_recorder.start()
+    yield
+    if traffic_recorder is not None:
+        traffic_recorder.stop()
+    username_index.stop()
+    invalidation_bus.stop()
+    # final flush of buffered login activity before the worker exits
+    activity_recorder.stop()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    LoadSheddingMiddleware,
+    max_checkout_wait=db_settings.DB_SHED_CHECKOUT_WAIT_SECONDS,
+    # none of these touch the database; key discovery and token checks must
+    # keep working while it is down
+    exempt_paths=("/health", "/.well-known", "/auth/verify"),
+)
+app.add_middleware(
+    QueryBudgetMiddleware,
+    expose_header=db_settings.DB_QUERY_COUNT_HEADER,
+    strict=db_settings.DB_QUERY_BUDGET_STRICT,
+)
+if traffic_recorder is not None:
+    # outermost, so recorded durations include the other middleware
+    app.add_middleware(TrafficRecorderMiddleware, recorder=traffic_recorder)
 app.include_router(user_router)
+app.include_router(auth_router)
+app.include_router(well_known_router)
+app.include_router(health_router)
+
+
+@app.exception_handler(DatabaseUnavailableError)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailableError):
+    return failure_response(InternalStatus.DB_CONNECTION_FAILED)
+
+
+@app.exception_handler(StatusFailure)
+async def status_failure_handler(request: Request, exc: StatusFailure):
+    return failure_response(exc.internal_status, exc.headers)
@@ -1,3 +1,29 @@
-from .db_manager import DatabaseManager, init_database, get_database
+from .circuit_breaker import (
+    CircuitBreaker,
+    CircuitPermit,
+    CircuitState,
+    DatabaseUnavailableError,
+)
+from .db_manager import (
+    DatabaseManager,
+    init_database,
+    get_database,
+    max_workers,
+    worker_pool_size,
+)
+from .query_counter import QueryCount, count_queries, install_query_counter
 
-__all__ = ["DatabaseManager", "get_database", "init_database"]
+__all__ = [
+    "CircuitBreaker",
+    "CircuitPermit",
+    "CircuitState",
+    "DatabaseManager",
+    "DatabaseUnavailableError",
+    "QueryCount",
+    "count_queries",
+    "get_database",
+    "init_database",
+    "install_query_counter",
+    "max_workers",
+    "worker_pool_size",
+]
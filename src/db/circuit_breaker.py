@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import StrEnum
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class DatabaseUnavailableError(Exception):
+    """Raised when the database is unreachable or the circuit breaker is open."""
+
+
+@dataclass(frozen=True, slots=True)
+class CircuitPermit:
+    """Handed out by ``CircuitBreaker.allow``; pass it back with the call's outcome."""
+
+    probe: bool
+    generation: int
+
+
+class CircuitBreaker:
+    """
+    Count-based circuit breaker for database access.
+
+    The breaker keeps the outcome of the last ``window_size`` calls. A call
+    fails if it raises a connectivity error or if its pool checkout took
+    longer than ``slow_checkout_seconds``. Once at least ``minimum_calls`` are
+    recorded and the failure rate reaches ``failure_rate_threshold``, the
+    breaker opens and rejects calls for ``open_seconds``. It then goes
+    half-open and lets ``half_open_max_calls`` probes through: if they all
+    succeed it closes, and any failure opens it again. Only calls admitted
+    as probes of the current half-open period decide that; calls still
+    running from before the breaker opened are ignored.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 20,
+        window_size: int = 50,
+        slow_checkout_seconds: float = 1.0,
+        open_seconds: float = 10.0,
+        half_open_max_calls: int = 3,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.slow_checkout_seconds = slow_checkout_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        # bumped on every transition, so permits from an earlier period are stale
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> CircuitPermit | None:
+        """
+        Admit a call, or return ``None`` if it must be rejected.
+
+        When half-open the permit reserves one of the probe slots.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.CLOSED:
+                return CircuitPermit(probe=False, generation=self._generation)
+            if state is CircuitState.OPEN:
+                return None
+            if self._half_open_in_flight >= self.half_open_max_calls:
+                return None
+            self._half_open_in_flight += 1
+            return CircuitPermit(probe=True, generation=self._generation)
+
+    def record_success(self, permit: CircuitPermit, checkout_wait: float = 0.0) -> None:
+        if checkout_wait > self.slow_checkout_seconds:
+            self.record_failure(permit)
+            return
+
+        with self._lock:
+            if permit.generation != self._generation:
+                return
+            if permit.probe:
+                self._half_open_in_flight -= 1
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._close()
+                return
+            self._outcomes.append(True)
+
+    def record_failure(self, permit: CircuitPermit) -> None:
+        with self._lock:
+            if permit.generation != self._generation:
+                return
+            if permit.probe:
+                self._open()
+                return
+            self._outcomes.append(False)
+            if self._should_open():
+                self._open()
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = calls - sum(self._outcomes)
+            return {
+                "state": str(self._current_state()),
+                "calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+            }
+
+    def _current_state(self) -> CircuitState:
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.open_seconds
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._generation += 1
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+        return self._state
+
+    def _should_open(self) -> bool:
+        calls = len(self._outcomes)
+        if calls < self.minimum_calls:
+            return False
+        failures = calls - sum(self._outcomes)
+        return failures / calls >= self.failure_rate_threshold
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._generation += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def _close(self) -> None:
+        self._state = CircuitState.CLOSED
+        self._generation += 1
+        self._outcomes.clear()
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
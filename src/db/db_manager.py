@@ -1,33 +1,179 @@
+import threading
+import time
 from contextlib import contextmanager
 from typing import Generator, Optional
 from sqlmodel import Session, create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+
+from src.db.circuit_breaker import CircuitBreaker, DatabaseUnavailableError
+
+
+# SQLSTATEs outside class 08 (connection exception) that also mean the server
+# is not taking work: admin/crash shutdown, still starting up, and
+# too_many_connections.
+UNAVAILABLE_SQLSTATES = frozenset({"57P01", "57P02", "57P03", "53300"})
+
+
+def is_connectivity_error(error: BaseException) -> bool:
+    """
+    Whether ``error`` means the database (or the pool in front of it) is not
+    answering, as opposed to a query that ran and failed.
+
+    Deadlocks, serialization failures and statement timeouts are
+    ``OperationalError`` too, so the driver's SQLSTATE decides: class 08 and
+    the codes above count, as do errors libpq raises without one (a dropped
+    socket) and pool checkout timeouts.
+    """
+    if isinstance(error, (PoolTimeoutError, InterfaceError)):
+        return True
+    if not isinstance(error, DBAPIError):
+        return False
+    if error.connection_invalidated:
+        return True
+    sqlstate = getattr(error.orig, "pgcode", None)
+    if sqlstate is None:
+        return isinstance(error, OperationalError)
+    return sqlstate.startswith("08") or sqlstate in UNAVAILABLE_SQLSTATES
+
+
+class PoolWaitTracker:
+    """
+    Exponentially weighted average of pool checkout wait.
+
+    The average decays towards zero while no samples arrive, so a burst of
+    slow checkouts does not keep the service marked as saturated after the
+    load that caused it has been shed.
+    """
+
+    def __init__(self, alpha: float = 0.2, half_life_seconds: float = 2.0):
+        self.alpha = alpha
+        self.half_life_seconds = half_life_seconds
+        self._value = 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, wait_seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            decayed = self._decayed(now)
+            self._value = decayed + self.alpha * (wait_seconds - decayed)
+            self._updated_at = now
+
+    def current(self) -> float:
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+    def _decayed(self, now: float) -> float:
+        elapsed = now - self._updated_at
+        return self._value * 0.5 ** (elapsed / self.half_life_seconds)
 
 
 class DatabaseManager:
     """Database manager that provides a context manager for database sessions."""
 
-    def __init__(self, database_url: str, echo: bool = False, **engine_kwargs):
+    def __init__(
+        self,
+        database_url: str,
+        echo: bool = False,
+        circuit_breaker: CircuitBreaker | None = None,
+        **engine_kwargs,
+    ):
         self.engine: Engine = create_engine(
             database_url,
             echo=echo,
             **engine_kwargs,
         )
+        # same database, but every connect opens a fresh connection that is
+        # closed again on release instead of taking a slot in the pool
+        self.dedicated_engine: Engine = create_engine(
+            database_url, echo=echo, poolclass=NullPool
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.pool_wait = PoolWaitTracker()
 
     @contextmanager
     def session(self) -> Generator[Session, None, None]:
-        session = Session(self.engine)
+        permit = self.circuit_breaker.allow()
+        if permit is None:
+            raise DatabaseUnavailableError("Database circuit breaker is open")
+
+        # repositories hand loaded rows back after the session closes, so keep
+        # their attributes populated across the commit
+        session = Session(self.engine, expire_on_commit=False)
+        checkout_wait = 0.0
         try:
+            started = time.perf_counter()
+            session.connection()
+            checkout_wait = time.perf_counter() - started
+            self.pool_wait.record(checkout_wait)
+
             yield session
             session.commit()
-        except Exception:
+        except Exception as e:
             session.rollback()
+            if is_connectivity_error(e):
+                self.circuit_breaker.record_failure(permit)
+                raise DatabaseUnavailableError(str(e)) from e
+            self.circuit_breaker.record_success(permit, checkout_wait)
             raise
+        else:
+            self.circuit_breaker.record_success(permit, checkout_wait)
         finally:
             session.close()
 
+    @contextmanager
+    def dedicated_connection(self) -> Generator[Connection, None, None]:
+        """
+        A connection outside the pool, for long-running background work that
+        must not hold a slot request handlers are waiting for. Each one counts
+        against the worker's ``reserved_per_worker`` in ``worker_pool_size``.
+        """
+        with self.dedicated_engine.connect() as connection:
+            yield connection
+
+    def pool_status(self) -> dict[str, object]:
+        """Cheap, in-process view of the connection pool; never touches the database."""
+        pool = self.engine.pool
+        status: dict[str, object] = {
+            "checkout_wait_seconds": round(self.pool_wait.current(), 4),
+        }
+        for name in ("size", "checkedout", "overflow", "checkedin"):
+            metric = getattr(pool, name, None)
+            if callable(metric):
+                status[name] = metric()
+        return status
+
     def dispose(self):
         self.engine.dispose()
+        self.dedicated_engine.dispose()
+
+
+def worker_pool_size(
+    connection_budget: int, workers: int, reserved_per_worker: int = 0
+) -> int:
+    """
+    Pool size that keeps ``workers`` processes within ``connection_budget``
+    connections in total, after each worker sets aside ``reserved_per_worker``
+    connections it opens outside the pool.
+    """
+    size = connection_budget // workers - reserved_per_worker
+    if size < 1:
+        raise ValueError(
+            f"A budget of {connection_budget} connections leaves no pool for "
+            f"{workers} workers reserving {reserved_per_worker} each"
+        )
+    return size
+
+
+def max_workers(connection_budget: int, reserved_per_worker: int = 0, min_pool_size: int = 1) -> int:
+    """
+    Most workers that fit in ``connection_budget`` with a pool of at least
+    ``min_pool_size`` each, never less than one.
+    """
+    return max(1, connection_budget // (min_pool_size + reserved_per_worker))
 
 
 _db_manager: Optional[DatabaseManager] = None
@@ -35,6 +181,7 @@ _db_manager: Optional[DatabaseManager] = None
 def init_database(
     database_url: str,
     echo: bool = False,
+    circuit_breaker: CircuitBreaker | None = None,
     **engine_kwargs,
 ) -> None:
     global _db_manager
@@ -42,10 +189,9 @@ def init_database(
     if _db_manager is not None:
         raise RuntimeError("Database already initialized")
 
-    _db_manager = DatabaseManager(database_url, echo, **engine_kwargs)
+    _db_manager = DatabaseManager(database_url, echo, circuit_breaker, **engine_kwargs)
 
 def get_database() -> DatabaseManager:
     if _db_manager is None:
         raise RuntimeError("Database not initialized. Call init_database() first.")
     return _db_manager
-
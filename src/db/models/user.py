@@ -11,3 +11,7 @@ class User(SQLModel, table=True):
     updated_at: datetime = Field(
         ..., description="timestamp when the user was last updated"
     )
+    last_login_at: datetime | None = Field(
+        default=None, description="timestamp of the user's last successful login"
+    )
+    login_count: int = Field(default=0, description="number of successful logins")
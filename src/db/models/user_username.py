@@ -0,0 +1,11 @@
+from sqlmodel import Field, SQLModel
+from uuid import UUID
+
+
+class UserUsername(SQLModel, table=True):
+    """Username -> id map used to look users up in the hash-partitioned layout."""
+
+    __tablename__ = "user_username"  # type: ignore
+
+    username: str = Field(..., description="username for the user", primary_key=True)
+    user_id: UUID = Field(..., description="id of the user owning the username")
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Generator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryCount:
+    """SQL statements executed and pool checkouts made within one scope."""
+
+    statements: int = 0
+    checkouts: int = 0
+
+
+_current_count: ContextVar[QueryCount | None] = ContextVar("query_count", default=None)
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    count = _current_count.get()
+    if count is not None:
+        count.statements += 1
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    count = _current_count.get()
+    if count is not None:
+        count.checkouts += 1
+
+
+def install_query_counter(engine: Engine) -> None:
+    """Attach statement and checkout counting to ``engine`` (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _on_execute):
+        event.listen(engine, "before_cursor_execute", _on_execute)
+    if not event.contains(engine, "checkout", _on_checkout):
+        event.listen(engine, "checkout", _on_checkout)
+
+
+@contextmanager
+def count_queries() -> Generator[QueryCount, None, None]:
+    """
+    Count statements and checkouts made in the current context.
+
+    Threads started through ``contextvars.copy_context`` (as FastAPI does for
+    sync endpoints and dependencies) share the same counter.
+    """
+    count = QueryCount()
+    token = _current_count.set(count)
+    try:
+        yield count
+    finally:
+        _current_count.reset(token)
@@ -0,0 +1,16 @@
+from src.middleware.load_shedding import LoadSheddingMiddleware
+from src.middleware.traffic_recorder import TrafficRecorder, TrafficRecorderMiddleware
+from src.middleware.query_budget import (
+    QUERY_BUDGETS,
+    QueryBudgetExceededError,
+    QueryBudgetMiddleware,
+)
+
+__all__ = [
+    "LoadSheddingMiddleware",
+    "QUERY_BUDGETS",
+    "QueryBudgetExceededError",
+    "QueryBudgetMiddleware",
+    "TrafficRecorder",
+    "TrafficRecorderMiddleware",
+]
@@ -0,0 +1,45 @@
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.types import ASGIApp
+
+from src.db import CircuitState, DatabaseManager, get_database
+from src.routes.status_message import StatusMessage
+
+
+class LoadSheddingMiddleware(BaseHTTPMiddleware):
+    """
+    Reject requests with 503 while the database is saturated or unreachable.
+
+    A request is shed when the database circuit breaker is open or when the
+    average pool checkout wait is over ``max_checkout_wait`` seconds. Paths in
+    ``exempt_paths`` (health checks) always go through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_checkout_wait: float = 0.5,
+        retry_after_seconds: int = 1,
+        exempt_paths: tuple[str, ...] = ("/health",),
+        db_manager: DatabaseManager | None = None,
+    ):
+        super().__init__(app)
+        self.max_checkout_wait = max_checkout_wait
+        self.retry_after_seconds = retry_after_seconds
+        self.exempt_paths = exempt_paths
+        self.db_manager = db_manager or get_database()
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint):
+        if not request.url.path.startswith(self.exempt_paths) and self._overloaded():
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": StatusMessage.SERVICE_UNAVAILABLE},
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+        return await call_next(request)
+
+    def _overloaded(self) -> bool:
+        if self.db_manager.circuit_breaker.state is CircuitState.OPEN:
+            return True
+        return self.db_manager.pool_wait.current() > self.max_checkout_wait
@@ -0,0 +1,92 @@
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.db import QueryCount, count_queries
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = b"x-db-query-count"
+
+
+# Maximum SQL statements per request, keyed by (method, route path template).
+# Mutations include one pg_notify for the Postgres invalidation transport.
+QUERY_BUDGETS: dict[tuple[str, str], int] = {
+    ("POST", "/auth/token"): 1,
+    ("POST", "/auth/refresh"): 1,
+    ("POST", "/auth/verify"): 0,
+    ("POST", "/users/register"): 4,
+    ("GET", "/users/me"): 1,
+    ("GET", "/users/available"): 1,
+    ("POST", "/users/batch"): 3,
+    ("PUT", "/users/me/password"): 3,
+    ("DELETE", "/users/me"): 3,
+    ("GET", "/health/ready"): 0,
+    ("GET", "/.well-known/jwks.json"): 0,
+}
+
+
+class QueryBudgetExceededError(AssertionError):
+    """Raised in strict mode when a request runs more statements than its budget."""
+
+
+class QueryBudgetMiddleware:
+    """
+    Count SQL statements and pool checkouts per request and enforce ``budgets``.
+
+    Over-budget requests are logged, or raise ``QueryBudgetExceededError`` when
+    ``strict`` is set so a test client fails on them. With ``expose_header`` the
+    counts are reported in an ``X-DB-Query-Count: <statements>;checkouts=<n>``
+    response header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        budgets: dict[tuple[str, str], int] | None = None,
+        expose_header: bool = False,
+        strict: bool = False,
+    ):
+        self.app = app
+        self.budgets = QUERY_BUDGETS if budgets is None else budgets
+        self.expose_header = expose_header
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as count:
+
+            async def send_with_count(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    self._check_budget(scope, count)
+                    if self.expose_header:
+                        value = f"{count.statements};checkouts={count.checkouts}"
+                        message["headers"] = [
+                            *message.get("headers", []),
+                            (QUERY_COUNT_HEADER, value.encode()),
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
+
+    def _check_budget(self, scope: Scope, count: QueryCount) -> None:
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if path is None:
+            return
+
+        budget = self.budgets.get((scope["method"], path))
+        if budget is None or count.statements <= budget:
+            return
+
+        message = (
+            f"{scope['method']} {path} ran {count.statements} SQL statements "
+            f"(budget {budget}, {count.checkouts} pool checkouts)"
+        )
+        if self.strict:
+            raise QueryBudgetExceededError(message)
+        logger.warning(message)
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Field names whose values never leave the process, only their shape.
+SECRET_FIELDS = frozenset(
+    {"password", "old_password", "new_password", "access_token", "client_secret", "token"}
+)
+
+MAX_CAPTURED_BODY = 64 * 1024
+
+
+def body_shape(value: Any) -> Any:
+    """
+    Describe a decoded body without its values: strings become ``"str:<len>"``,
+    scalars their type name, secrets ``"secret"``, and lists the shape of their
+    first item plus their length.
+    """
+    if isinstance(value, dict):
+        return {
+            key: "secret" if key in SECRET_FIELDS else body_shape(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return {"list": len(value), "item": body_shape(value[0]) if value else None}
+    if isinstance(value, str):
+        return f"str:{len(value)}"
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+
+def _decode_body(content_type: str, body: bytes) -> Any:
+    if not body:
+        return None
+    try:
+        if content_type.startswith("application/json"):
+            return json.loads(body)
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return dict(parse_qsl(body.decode(), keep_blank_values=True))
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return {"bytes": len(body)}
+
+
+def worker_path(path: str, pid: int) -> str:
+    """``traffic.ndjson`` -> ``traffic.<pid>.ndjson``: one file per worker process."""
+    base = Path(path)
+    return str(base.with_name(f"{base.stem}.{pid}{base.suffix}"))
+
+
+class TrafficRecorder:
+    """
+    Rotating NDJSON sink for sampled request metadata.
+
+    Records are queued and written by a ``QueueListener`` thread, so request
+    handling never waits on file I/O. ``start()``/``stop()`` belong in the app
+    lifespan; ``stop()`` drains the queue. The file is opened in ``start()``
+    and named after the worker's pid (see ``worker_path``), so workers forked
+    from one preloaded app never rotate the same file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 0.01,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener: QueueListener | None = None
+
+        self._logger = logging.getLogger(f"{__name__}.{path}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(QueueHandler(self._queue))
+
+    def sampled(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def record(self, entry: dict[str, Any]) -> None:
+        self._logger.info(json.dumps(entry, separators=(",", ":")))
+
+    def start(self) -> None:
+        file_handler = RotatingFileHandler(
+            worker_path(self.path, os.getpid()),
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = QueueListener(self._queue, file_handler)
+        self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+
+
+class TrafficRecorderMiddleware:
+    """
+    Record a sample of requests for ``scripts/replay_traffic.py``.
+
+    Each sampled request is written as one line: wall-clock start time, method,
+    route template, status, duration and the shapes of its query string and
+    body (see ``body_shape``). Values and headers are never recorded; ``auth``
+    only says whether a bearer token was sent.
+    """
+
+    def __init__(self, app: ASGIApp, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.recorder.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        started = time.perf_counter()
+        body = bytearray()
+        status_code = 500
+
+        async def capture_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < MAX_CAPTURED_BODY:
+                body.extend(message.get("body", b"")[: MAX_CAPTURED_BODY - len(body)])
+            return message
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            headers = dict(scope.get("headers", []))
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            route = scope.get("route")
+            query_string = scope.get("query_string", b"").decode("latin-1")
+            self.recorder.record(
+                {
+                    "ts": round(started_at, 6),
+                    "method": scope["method"],
+                    "route": getattr(route, "path", scope["path"]),
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "auth": headers.get(b"authorization", b"").lower().startswith(b"bearer "),
+                    "content_type": content_type.split(";")[0],
+                    "query": body_shape(dict(parse_qsl(query_string, keep_blank_values=True)))
+                    if query_string
+                    else None,
+                    "body": body_shape(_decode_body(content_type, bytes(body))),
+                }
+            )
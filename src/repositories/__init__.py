@@ -1,21 +1,3 @@
-from src.repositories.user import (
-    create_user,
-    get_user_by_id,
-    get_user_by_username,
-    update_user,
-    delete_user,
-    user_exists,
-    update_password,
-    get_all_users,
-)
+from src.repositories.user import UserRepository
 
-__all__ = [
-    "create_user",
-    "get_user_by_id",
-    "get_user_by_username",
-    "update_user",
-    "delete_user",
-    "user_exists",
-    "update_password",
-    "get_all_users",
-]
+__all__ = ["UserRepository"]
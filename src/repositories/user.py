@@ -1,16 +1,66 @@
+from datetime import datetime
+from typing import Iterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import any_, cast, func, literal, text
+from sqlalchemy import delete as sa_delete, update as sa_update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, VARCHAR
+from sqlalchemy.orm import load_only
 from sqlmodel import select
 
-from src.db.models import User
+from src.db.models import User, UserUsername
 from src.db import DatabaseManager, get_database
+from src.settings import DatabaseSettings
+
+# Upper bound on the number of keys bound into a single ``= ANY(...)`` array.
+BATCH_LOOKUP_CHUNK_SIZE = 1000
+
+
+def _chunked(values: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _parse_uuid(value: str) -> UUID | None:
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
 
 class UserRepository:
-    """Repository for User database operations."""
+    """
+    Repository for User database operations.
+
+    With ``partitioned`` set, ``"user"`` is hash-partitioned on ``id``: id
+    lookups are pruned to a single partition by the planner, and username
+    lookups resolve the id through ``user_username`` first instead of probing
+    every partition's username index.
+    """
 
-    def __init__(self, db_manager: DatabaseManager | None = None):
+    def __init__(
+        self,
+        db_manager: DatabaseManager | None = None,
+        partitioned: bool | None = None,
+    ):
         if db_manager is None:
             db_manager = get_database()
+        if partitioned is None:
+            partitioned = DatabaseSettings().USER_TABLE_PARTITIONED  # type: ignore
 
         self.db_manager = db_manager
+        self.partitioned = partitioned
+
+    def _select_users(self, *columns):
+        statement = select(User)
+        if columns:
+            statement = statement.options(load_only(*columns))
+        if self.partitioned:
+            statement = statement.join(UserUsername, UserUsername.user_id == User.id)  # type: ignore
+        return statement
+
+    def _username_column(self):
+        return UserUsername.username if self.partitioned else User.username
 
     def create(self, user: User) -> User:
         with self.db_manager.session() as session:
@@ -20,55 +70,208 @@ class UserRepository:
             return user
 
     def get_by_id(self, user_id: str) -> User | None:
+        key = _parse_uuid(user_id)
+        if key is None:
+            return None
+
         with self.db_manager.session() as session:
-            user = session.get(User, user_id)
+            user = session.get(User, key)
             return user
 
     def get_by_username(self, username: str) -> User | None:
         with self.db_manager.session() as session:
-            statement = select(User).where(User.username == username)
+            statement = self._select_users().where(self._username_column() == username)
             user = session.exec(statement).first()
             return user
 
+    def get_credentials_by_username(self, username: str) -> User | None:
+        """Partial row (idx_user_username_auth columns) for a password check; never cache or return it."""
+        with self.db_manager.session() as session:
+            statement = self._select_users(
+                User.id,  # type: ignore
+                User.username,  # type: ignore
+                User.password_hash,  # type: ignore
+                User.created_at,  # type: ignore
+                User.updated_at,  # type: ignore
+            ).where(self._username_column() == username)
+            user = session.exec(statement).first()
+            return user
+
+    def get_many_by_ids(self, user_ids: Sequence[str]) -> list[User | None]:
+        """
+        Fetch several users by id with one ``WHERE id = ANY(...)`` query per chunk.
+
+        Results follow the order of ``user_ids``; ids that are malformed or
+        unknown come back as ``None``.
+        """
+        parsed = [_parse_uuid(user_id) for user_id in user_ids]
+        keys = list(dict.fromkeys(key for key in parsed if key is not None))
+        found: dict[UUID, User] = {}
+
+        with self.db_manager.session() as session:
+            for chunk in _chunked(keys, BATCH_LOOKUP_CHUNK_SIZE):
+                statement = select(User).where(
+                    User.id == any_(cast(list(chunk), ARRAY(PG_UUID(as_uuid=True))))
+                )
+                for user in session.exec(statement):
+                    found[user.id] = user
+
+        return [found.get(key) if key is not None else None for key in parsed]
+
+    def get_many_by_usernames(self, usernames: Sequence[str]) -> list[User | None]:
+        """
+        Fetch several users by username with one ``WHERE username = ANY(...)``
+        query per chunk.
+
+        Results follow the order of ``usernames``; unknown names come back as ``None``.
+        """
+        keys = list(dict.fromkeys(usernames))
+        found: dict[str, User] = {}
+
+        with self.db_manager.session() as session:
+            for chunk in _chunked(keys, BATCH_LOOKUP_CHUNK_SIZE):
+                statement = self._select_users().where(
+                    self._username_column() == any_(cast(list(chunk), ARRAY(VARCHAR)))
+                )
+                for user in session.exec(statement):
+                    found.setdefault(user.username, user)
+
+        return [found.get(username) for username in usernames]
+
     def get_all(self) -> list[User]:
         with self.db_manager.session() as session:
             statement = select(User)
             users = session.exec(statement).all()
             return list(users)
 
-    def exists(self, username: str) -> bool:
-        return self.get_by_username(username) is not None
+    def count(self) -> int:
+        with self.db_manager.session() as session:
+            return session.exec(select(func.count()).select_from(User)).one()
+
+    def iter_usernames(self, batch_size: int = 10_000) -> Iterator[str]:
+        """
+        Stream every username through a server-side cursor.
 
-    def update(self, user_id: str, **kwargs) -> User:
+        The scan can run for minutes, so it uses a dedicated connection
+        instead of holding one from the request pool.
+        """
+        with self.db_manager.dedicated_connection() as connection:
+            statement = select(self._username_column()).execution_options(
+                yield_per=batch_size
+            )
+            yield from connection.execute(statement).scalars()
+
+    def exists(self, username: str) -> bool:
         with self.db_manager.session() as session:
-            user = session.get(User, user_id)
-            if not user:
-                raise ValueError(f"User with id {user_id} not found")
+            statement = select(literal(1)).where(self._username_column() == username).limit(1)
+            return session.exec(statement).first() is not None
 
-            for key, value in kwargs.items():
-                if hasattr(user, key):
-                    setattr(user, key, value)
+    def update(
+        self,
+        user_id: str,
+        expected_updated_at: datetime | None = None,
+        **kwargs,
+    ) -> User | None:
+        """
+        Update columns with a single ``UPDATE ... WHERE id = :id RETURNING``.
 
-            session.add(user)
-            session.flush()
-            session.refresh(user)
-            return user
+        With ``expected_updated_at`` the row is only written if it still has
+        that version, so a concurrent edit is detected without locking.
+        Returns ``None`` when no row matched (missing user or stale version).
+        """
+        key = _parse_uuid(user_id)
+        values = {
+            name: value
+            for name, value in kwargs.items()
+            if name in User.model_fields and name != "id"
+        }
+        if key is None or not values:
+            return None
+
+        statement = sa_update(User).where(User.id == key)  # type: ignore
+        if expected_updated_at is not None:
+            statement = statement.where(User.updated_at == expected_updated_at)  # type: ignore
+        statement = statement.values(**values).returning(User)
 
-    def update_password(self, user_id: str, new_password_hash: str) -> bool:
         with self.db_manager.session() as session:
-            user = session.get(User, user_id)
-            if not user:
-                return False
+            return session.execute(
+                statement, execution_options={"synchronize_session": False}
+            ).scalars().first()
 
-            user.password_hash = new_password_hash
-            session.add(user)
-            return True
+    def record_logins(self, activity: Sequence[tuple[UUID, datetime, int]]) -> int:
+        """
+        Apply buffered login activity with one multi-row ``UPDATE ... FROM (VALUES ...)``.
+
+        Each entry is ``(user_id, last_login_at, login_count_delta)``. Returns the
+        number of rows updated. Rows are locked in id order, so concurrent
+        flushes from several workers cannot deadlock on each other.
+        """
+        if not activity:
+            return 0
+
+        rows = []
+        params: dict[str, object] = {}
+        ordered = sorted(activity, key=lambda entry: entry[0])
+        for index, (user_id, last_login_at, count) in enumerate(ordered):
+            rows.append(
+                f"(CAST(:id_{index} AS UUID), CAST(:at_{index} AS TIMESTAMPTZ), "
+                f"CAST(:n_{index} AS INTEGER))"
+            )
+            params[f"id_{index}"] = str(user_id)
+            params[f"at_{index}"] = last_login_at
+            params[f"n_{index}"] = count
+
+        # the join may visit rows in any order, so take the row locks up front
+        # in a sorted FOR UPDATE; the UPDATE then only touches locked rows
+        statement = text(
+            f"WITH v(id, last_login_at, login_count) AS (VALUES {', '.join(rows)}), "
+            'locked AS (SELECT u.id FROM "user" AS u JOIN v ON u.id = v.id '
+            "ORDER BY u.id FOR UPDATE OF u) "
+            'UPDATE "user" AS u '
+            "SET last_login_at = GREATEST(u.last_login_at, v.last_login_at), "
+            "login_count = u.login_count + v.login_count "
+            "FROM v JOIN locked ON locked.id = v.id "
+            "WHERE u.id = v.id"
+        )
 
-    def delete(self, user_id: str) -> bool:
         with self.db_manager.session() as session:
-            user = session.get(User, user_id)
-            if not user:
-                return False
+            result = session.execute(statement, params)
+            return result.rowcount
 
-            session.delete(user)
-            return True
+    def update_password(
+        self,
+        user_id: str,
+        new_password_hash: str,
+        updated_at: datetime,
+        expected_updated_at: datetime | None = None,
+    ) -> User | None:
+        """Set a new password hash in one statement; see ``update`` for the version check."""
+        return self.update(
+            user_id,
+            expected_updated_at=expected_updated_at,
+            password_hash=new_password_hash,
+            updated_at=updated_at,
+        )
+
+    def delete(
+        self, user_id: str, expected_updated_at: datetime | None = None
+    ) -> tuple[UUID, str] | None:
+        """
+        Delete with a single ``DELETE ... RETURNING id, username``.
+
+        Returns the deleted ``(id, username)``, or ``None`` when no row matched.
+        """
+        key = _parse_uuid(user_id)
+        if key is None:
+            return None
+
+        statement = sa_delete(User).where(User.id == key)  # type: ignore
+        if expected_updated_at is not None:
+            statement = statement.where(User.updated_at == expected_updated_at)  # type: ignore
+        statement = statement.returning(User.id, User.username)  # type: ignore
+
+        with self.db_manager.session() as session:
+            row = session.execute(
+                statement, execution_options={"synchronize_session": False}
+            ).first()
+            return (row.id, row.username) if row is not None else None
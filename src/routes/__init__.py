@@ -1,4 +1,5 @@
 from src.routes.user import user_router
-from src.routes.auth import auth_router
+from src.routes.auth import auth_router, well_known_router
+from src.routes.health import health_router
 
-__all__ = ["user_router", "auth_router"]
+__all__ = ["user_router", "auth_router", "well_known_router", "health_router"]
@@ -1,17 +1,18 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from src.routes.dependencies import (
     get_auth_service,
     oauth2_scheme,
-    get_http_status,
-    get_status_message,
+    failure_response,
 )
 from src.routes.schemas import TokenResponse
 from src.services.auth import AuthenticationService
 
 
 auth_router = APIRouter(prefix="/auth", tags=["authentication"])
+well_known_router = APIRouter(prefix="/.well-known", tags=["authentication"])
 
 
 @auth_router.post(
@@ -31,10 +32,7 @@ def login(
     if result.is_success:
         return TokenResponse(access_token=result.data, token_type="bearer")  # type: ignore
 
-    raise HTTPException(
-        status_code=get_http_status(result.status, status.HTTP_401_UNAUTHORIZED),
-        detail=get_status_message(result.status, result.message),
-    )
+    return failure_response(result.status)
 
 
 @auth_router.post(
@@ -58,10 +56,7 @@ def refresh_token(
     if result.is_success:
         return TokenResponse(access_token=result.data, token_type="bearer")  # type: ignore
 
-    raise HTTPException(
-        status_code=get_http_status(result.status, status.HTTP_401_UNAUTHORIZED),
-        detail=get_status_message(result.status, result.message),
-    )
+    return failure_response(result.status)
 
 
 @auth_router.post(
@@ -83,7 +78,17 @@ def verify_token(
             "username": result.data,
         }
 
-    raise HTTPException(
-        status_code=get_http_status(result.status, status.HTTP_401_UNAUTHORIZED),
-        detail=get_status_message(result.status, result.message),
+    return failure_response(result.status)
+
+
+@well_known_router.get(
+    "/jwks.json",
+    summary="JSON Web Key Set",
+    description="Public keys for verifying access tokens without calling this service.",
+)
+def get_jwks(auth_service: AuthenticationService = Depends(get_auth_service)):
+    """Publish the public half of every signing key that is not retired."""
+    return JSONResponse(
+        content=auth_service.get_jwks(),
+        headers={"Cache-Control": "public, max-age=300"},
     )
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from src.db.models import User
+from src.routes.dependencies import get_current_user
+
+
+Validators = tuple[str, datetime]
+
+
+def user_validators(user: User) -> Validators:
+    """ETag and Last-Modified for a user, derived from its id and ``updated_at``."""
+    updated_at = user.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    version = int(updated_at.timestamp() * 1_000_000)
+    return f'W/"{user.id.hex}-{version:x}"', updated_at
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_get(
+    dependency: Callable[..., Any],
+    validators: Callable[[Any], Validators],
+) -> Callable[..., Any]:
+    """
+    Wrap a resource dependency with conditional GET handling.
+
+    The returned dependency resolves ``dependency`` and computes its
+    validators. If the request's ``If-None-Match`` (or, without it,
+    ``If-Modified-Since``) still matches, the request ends with 304 Not
+    Modified before the endpoint builds a response. Otherwise ETag and
+    Last-Modified are set on the response and the resource is passed on.
+    """
+
+    async def resolve(
+        request: Request, response: Response, resource: Any = Depends(dependency)
+    ) -> Any:
+        etag, last_modified = validators(resource)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+            "Cache-Control": "private, no-cache",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            not_modified = if_modified_since is not None and _not_modified_since(
+                if_modified_since, last_modified
+            )
+
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return resource
+
+    return resolve
+
+
+get_current_user_conditional = conditional_get(get_current_user, user_validators)
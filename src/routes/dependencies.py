@@ -1,8 +1,19 @@
-from fastapi import Depends, HTTPException, status
+import json
+
+from fastapi import Depends, Response, status
 from fastapi.security import OAuth2PasswordBearer
 
+from src.services.activity import LoginActivityRecorder
 from src.services.auth import AuthenticationService
 from src.services.user import UserService
+from src.services.membership import UsernameIndex
+from src.repositories.user import UserRepository
+from src.services.invalidation import (
+    InvalidationBus,
+    LoopbackTransport,
+    PostgresNotifyTransport,
+)
+from src.settings import DatabaseSettings
 from src.services.status import InternalStatus
 from src.db.models import User
 from src.routes.status_message import StatusMessage
@@ -10,14 +21,31 @@ from src.routes.status_message import StatusMessage
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-auth_service = AuthenticationService()
-user_service = UserService()
+invalidation_bus = InvalidationBus(
+    PostgresNotifyTransport()
+    if DatabaseSettings().CACHE_INVALIDATION_TRANSPORT == "postgres"  # type: ignore
+    else LoopbackTransport()
+)
+user_repository = UserRepository()
+username_index = UsernameIndex(user_repository)
+user_service = UserService(
+    user_repository, invalidation_bus=invalidation_bus, username_index=username_index
+)
+activity_recorder = LoginActivityRecorder(user_repository)
+auth_service = AuthenticationService(
+    user_service=user_service, activity_recorder=activity_recorder
+)
+invalidation_bus.subscribe(
+    auth_service.on_user_invalidated, auth_service.principal_cache.clear
+)
+invalidation_bus.subscribe(username_index.on_user_invalidated, username_index.on_flush)
 
 
 STATUS_CODE_MAP = {
     InternalStatus.SUCCESS: status.HTTP_200_OK,
     InternalStatus.USER_NOT_FOUND: status.HTTP_404_NOT_FOUND,
     InternalStatus.USER_ALREADY_EXISTS: status.HTTP_409_CONFLICT,
+    InternalStatus.CONCURRENT_MODIFICATION: status.HTTP_409_CONFLICT,
     InternalStatus.WRONG_PASSWORD: status.HTTP_401_UNAUTHORIZED,
     InternalStatus.INVALID_TOKEN: status.HTTP_401_UNAUTHORIZED,
     InternalStatus.TOKEN_EXPIRED: status.HTTP_401_UNAUTHORIZED,
@@ -29,6 +57,7 @@ STATUS_MESSAGE_MAP = {
     InternalStatus.SUCCESS: StatusMessage.SUCCESS,
     InternalStatus.USER_NOT_FOUND: StatusMessage.USER_NOT_FOUND,
     InternalStatus.USER_ALREADY_EXISTS: StatusMessage.USERNAME_TAKEN,
+    InternalStatus.CONCURRENT_MODIFICATION: StatusMessage.CONCURRENT_MODIFICATION,
     InternalStatus.WRONG_PASSWORD: StatusMessage.WRONG_PASSWORD,
     InternalStatus.INVALID_TOKEN: StatusMessage.INVALID_TOKEN,
     InternalStatus.TOKEN_EXPIRED: StatusMessage.TOKEN_EXPIRED,
@@ -36,31 +65,67 @@ STATUS_MESSAGE_MAP = {
 }
 
 
-def get_http_status(
-    internal_status: InternalStatus, default: int = status.HTTP_400_BAD_REQUEST
-) -> int:
-    return STATUS_CODE_MAP.get(internal_status, default)
+def _encode_detail(message: str) -> bytes:
+    # same encoding as JSONResponse
+    return json.dumps(
+        {"detail": message}, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+# Status code and encoded JSON body of the error response for each failure,
+# built once so failing requests neither format a message nor serialize one.
+FAILURE_RESPONSES: dict[InternalStatus, tuple[int, bytes]] = {
+    internal_status: (
+        STATUS_CODE_MAP[internal_status],
+        _encode_detail(STATUS_MESSAGE_MAP[internal_status]),
+    )
+    for internal_status in InternalStatus
+    if internal_status is not InternalStatus.SUCCESS
+}
+
+_INTERNAL_ERROR_RESPONSE = (
+    status.HTTP_500_INTERNAL_SERVER_ERROR,
+    _encode_detail(StatusMessage.INTERNAL_ERROR),
+)
+
+_BEARER_CHALLENGE = {"WWW-Authenticate": "Bearer"}
+
+
+class StatusFailure(Exception):
+    """
+    Ends the request with the pre-built failure response for a status.
+
+    For dependencies, which cannot return a response; endpoints return
+    ``failure_response`` directly.
+    """
+
+    def __init__(
+        self, internal_status: InternalStatus, headers: dict[str, str] | None = None
+    ):
+        super().__init__(internal_status)
+        self.internal_status = internal_status
+        self.headers = headers
 
 
-def get_status_message(
-    internal_status: InternalStatus, custom_message: str | None = None
-) -> str:
-    """Get user-facing message from internal status."""
-    if custom_message:
-        return custom_message
-    return STATUS_MESSAGE_MAP.get(internal_status, StatusMessage.INTERNAL_ERROR)
+def failure_response(
+    internal_status: InternalStatus, headers: dict[str, str] | None = None
+) -> Response:
+    """Error response for a failed result's status."""
+    status_code, body = FAILURE_RESPONSES.get(internal_status, _INTERNAL_ERROR_RESPONSE)
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """Dependency to extract and validate user from JWT token."""
     result = auth_service.get_user_from_token(token)
 
     if result.is_failure:
-        raise HTTPException(
-            status_code=get_http_status(result.status, status.HTTP_401_UNAUTHORIZED),
-            detail=get_status_message(result.status, result.message),
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise StatusFailure(result.status, _BEARER_CHALLENGE)
 
     return result.data  # type: ignore
 
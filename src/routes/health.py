@@ -0,0 +1,33 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from src.db import CircuitState, get_database
+from src.routes.dependencies import username_index
+
+
+health_router = APIRouter(prefix="/health", tags=["health"])
+
+
+@health_router.get(
+    "/ready",
+    summary="Readiness probe",
+    description=(
+        "Report circuit breaker, connection pool and username index state "
+        "without querying the database."
+    ),
+)
+def readiness():
+    """Return 200 while the database circuit is not open, 503 otherwise."""
+    db = get_database()
+    breaker = db.circuit_breaker.snapshot()
+    ready = breaker["state"] != CircuitState.OPEN
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "ready" if ready else "unavailable",
+            "breaker": breaker,
+            "pool": db.pool_status(),
+            "username_index": username_index.stats(),
+        },
+    )
@@ -20,6 +20,39 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class UserBatchRequest(BaseModel):
+    """Request model for resolving several users at once."""
+
+    ids: list[str] = Field(
+        default_factory=list, max_length=1000, description="User ids to resolve"
+    )
+    usernames: list[str] = Field(
+        default_factory=list, max_length=1000, description="Usernames to resolve"
+    )
+
+
+class UserBatchEntry(BaseModel):
+    """A single lookup result; ``user`` is null when the key did not match."""
+
+    key: str
+    found: bool
+    user: UserResponse | None = None
+
+
+class UserBatchResponse(BaseModel):
+    """Response model for batch lookups, in request order."""
+
+    ids: list[UserBatchEntry]
+    usernames: list[UserBatchEntry]
+
+
+class UsernameAvailabilityResponse(BaseModel):
+    """Response model for username availability checks."""
+
+    username: str
+    available: bool
+
+
 class RegistrationResponse(BaseModel):
     """Response model for user registration."""
 
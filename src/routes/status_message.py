@@ -20,11 +20,12 @@ class StatusMessage:
     USER_NOT_FOUND = "User not found"
     PROFILE_UPDATED = "Profile updated successfully"
     ACCOUNT_DELETED = "Account deleted successfully"
+    CONCURRENT_MODIFICATION = "Your account was changed in the meantime. Please retry"
 
     # Password
     PASSWORD_CHANGED = "Password changed successfully"
     PASSWORD_RESET = "Password reset successfully"
-    WRONG_PASSWORD = "Current password is incorrect"
+    WRONG_PASSWORD = "Incorrect password"
     PASSWORD_TOO_WEAK = "Password must be at least 8 characters"
 
     # Server errors
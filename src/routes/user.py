@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Query, status
 
+from src.routes.conditional import get_current_user_conditional
 from src.routes.dependencies import (
     get_current_user,
     get_user_service,
-    get_http_status,
-    get_status_message,
+    failure_response,
 )
 from src.routes.schemas import (
     UserCreate,
     UserResponse,
+    UserBatchRequest,
+    UserBatchEntry,
+    UserBatchResponse,
+    UsernameAvailabilityResponse,
     RegistrationResponse,
     PasswordChange,
     MessageResponse,
@@ -21,6 +25,26 @@ from src.services.user import UserService
 user_router = APIRouter(prefix="/users", tags=["users"])
 
 
+def _to_user_response(user: User) -> UserResponse:
+    return UserResponse(
+        id=str(user.id),
+        username=user.username,
+        created_at=user.created_at.isoformat(),
+        updated_at=user.updated_at.isoformat(),
+    )
+
+
+def _to_batch_entries(keys: list[str], users: list[User | None]) -> list[UserBatchEntry]:
+    return [
+        UserBatchEntry(
+            key=key,
+            found=user is not None,
+            user=_to_user_response(user) if user is not None else None,
+        )
+        for key, user in zip(keys, users)
+    ]
+
+
 @user_router.post(
     "/register",
     response_model=RegistrationResponse,
@@ -28,7 +52,7 @@ user_router = APIRouter(prefix="/users", tags=["users"])
     summary="Register a new user",
     description="Create a new user account with username and password.",
 )
-async def register(
+def register(
     user: UserCreate,
     user_service: UserService = Depends(get_user_service),
 ):
@@ -46,25 +70,65 @@ async def register(
             message=result.message or "User registered successfully",
         )
 
-    raise HTTPException(
-        status_code=get_http_status(result.status, status.HTTP_400_BAD_REQUEST),
-        detail=get_status_message(result.status, result.message),
-    )
+    return failure_response(result.status)
+
+
+@user_router.get(
+    "/available",
+    response_model=UsernameAvailabilityResponse,
+    summary="Check username availability",
+    description="Tell whether a username is still free, without registering it.",
+)
+def check_username_available(
+    username: str = Query(..., min_length=3, max_length=50, description="Username"),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Check whether a username can be registered.
+
+    The answer is advisory: a name can still be taken before registration.
+    """
+    result = user_service.is_username_available(username)
+    return UsernameAvailabilityResponse(username=username, available=bool(result.data))
 
 
 @user_router.get(
     "/me",
     response_model=UserResponse,
     summary="Get current user profile",
-    description="Retrieve the profile of the currently authenticated user.",
+    description=(
+        "Retrieve the profile of the currently authenticated user. "
+        "Supports conditional requests via If-None-Match / If-Modified-Since."
+    ),
 )
-async def get_my_profile(current_user: User = Depends(get_current_user)):
+async def get_my_profile(current_user: User = Depends(get_current_user_conditional)):
     """Get the profile of the currently authenticated user."""
-    return UserResponse(
-        id=str(current_user.id),
-        username=current_user.username,
-        created_at=current_user.created_at.isoformat(),
-        updated_at=current_user.updated_at.isoformat(),
+    return _to_user_response(current_user)
+
+
+@user_router.post(
+    "/batch",
+    response_model=UserBatchResponse,
+    summary="Resolve several users at once",
+    description="Look up users by id and/or username in a single request.",
+)
+def get_users_batch(
+    lookup: UserBatchRequest,
+    current_user: User = Depends(get_current_user),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Resolve lists of user ids and usernames.
+
+    Each list is answered in request order; keys without a matching user are
+    returned with `found: false`.
+    """
+    ids_result = user_service.get_users_by_ids(lookup.ids)
+    usernames_result = user_service.get_users_by_usernames(lookup.usernames)
+
+    return UserBatchResponse(
+        ids=_to_batch_entries(lookup.ids, ids_result.data or []),
+        usernames=_to_batch_entries(lookup.usernames, usernames_result.data or []),
     )
 
 
@@ -74,7 +138,7 @@ async def get_my_profile(current_user: User = Depends(get_current_user)):
     summary="Change password",
     description="Change the password for the currently authenticated user.",
 )
-async def change_my_password(
+def change_my_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
     user_service: UserService = Depends(get_user_service),
@@ -85,7 +149,10 @@ async def change_my_password(
     Requires the current password for verification.
     """
     result = user_service.change_password(
-        str(current_user.id), password_data.old_password, password_data.new_password
+        str(current_user.id),
+        password_data.old_password,
+        password_data.new_password,
+        current_user=current_user,
     )
 
     if result.is_success:
@@ -94,10 +161,7 @@ async def change_my_password(
             message=result.message or "Password changed successfully",
         )
 
-    raise HTTPException(
-        status_code=get_http_status(result.status, status.HTTP_400_BAD_REQUEST),
-        detail=get_status_message(result.status, result.message),
-    )
+    return failure_response(result.status)
 
 
 @user_router.delete(
@@ -106,7 +170,7 @@ async def change_my_password(
     summary="Delete current user account",
     description="Permanently delete the currently authenticated user's account.",
 )
-async def delete_my_account(
+def delete_my_account(
     current_user: User = Depends(get_current_user),
     user_service: UserService = Depends(get_user_service),
 ):
@@ -123,7 +187,4 @@ async def delete_my_account(
             message=result.message or "Account deleted successfully",
         )
 
-    raise HTTPException(
-        status_code=get_http_status(result.status, status.HTTP_400_BAD_REQUEST),
-        detail=get_status_message(result.status, result.message),
-    )
+    return failure_response(result.status)
@@ -0,0 +1,260 @@
+"""
+Pre-forking server entry point.
+
+    python -m src.server
+
+The app is imported once in this (master) process, which then binds the
+listening socket and forks ``WEB_CONCURRENCY`` uvicorn workers. Workers
+share the preloaded code and data pages copy-on-write and accept from the
+same socket; each runs its own lifespan, so background threads, caches and
+the DB pool are per worker. The app sizes that pool from
+``DB_CONNECTION_BUDGET`` divided by the worker count, less the connections
+each worker opens outside it.
+
+By default there is one worker per available CPU (affinity mask and CFS
+quota), capped so that every worker still gets a pool of
+``DB_MIN_POOL_SIZE``: past that point more workers only queue on smaller
+pools.
+
+Signals to the master:
+
+- ``SIGTERM`` / ``SIGINT``: stop workers gracefully, then exit.
+- ``SIGHUP``: replace workers one at a time. Each worker is stopped before
+  its replacement starts, so the pools never exceed the connection budget;
+  meanwhile the remaining workers serve, and with a single worker new
+  connections wait in the socket backlog. Code is not re-imported; deploy
+  new code by restarting the master.
+
+Workers that exit, whether crashed or recycled by ``WORKER_MAX_REQUESTS``,
+are replaced.
+"""
+
+import logging
+import math
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from src.db import max_workers
+from src.settings import DatabaseSettings, ServerSettings
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def cpu_quota(cgroup_root: str = "/sys/fs/cgroup") -> float | None:
+    """CPUs' worth of time the cgroup's CFS quota allows, or ``None`` without one."""
+    try:
+        # cgroup v2: "<quota> <period>", quota "max" when unlimited
+        with open(os.path.join(cgroup_root, "cpu.max")) as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota -1 when unlimited
+            with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us")) as f:
+                quota = f.read().strip()
+            with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us")) as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+
+    if quota in ("max", "-1"):
+        return None
+    try:
+        return int(quota) / int(period)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def available_cpus(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """
+    CPUs this process may use: its affinity mask (container cpusets),
+    further limited by a CFS quota (``docker --cpus``, Kubernetes limits).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+
+    quota = cpu_quota(cgroup_root)
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+class Supervisor:
+    """Forks uvicorn workers on a shared socket and keeps ``workers`` of them running."""
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        sockets: list[socket.socket],
+        workers: int,
+        graceful_timeout: float = 30.0,
+    ):
+        self.config = config
+        self.sockets = sockets
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self._pids: set[int] = set()
+        self._stopping = False
+        self._restart_requested = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_restart)
+        logger.info("Started supervisor [%d] with %d workers", os.getpid(), self.workers)
+
+        while not self._stopping:
+            self._reap()
+            if self._restart_requested:
+                self._restart_requested = False
+                self._restart()
+            while len(self._pids) < self.workers and not self._stopping:
+                self._spawn()
+            time.sleep(0.5)
+
+        logger.info("Stopping %d workers", len(self._pids))
+        for pid in list(self._pids):
+            self._signal(pid, signal.SIGTERM)
+        for pid in list(self._pids):
+            self._wait(pid)
+
+    def _on_stop(self, signum: int, frame: object) -> None:
+        self._stopping = True
+
+    def _on_restart(self, signum: int, frame: object) -> None:
+        self._restart_requested = True
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self._pids.add(pid)
+
+    def _run_worker(self) -> None:
+        """Body of a forked worker; never returns into the master's loop."""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # restarts are the master's job; a terminal hang-up must not kill workers
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        exit_code = 0
+        try:
+            from src.db import get_database
+
+            # connections must never cross a fork; start from an empty pool
+            get_database().engine.dispose(close=False)
+            uvicorn.Server(self.config).run(sockets=self.sockets)
+        except BaseException:
+            logger.exception("Worker [%d] failed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _restart(self) -> None:
+        # stop first: a replacement running next to its predecessor would hold
+        # one pool more than the connection budget allows
+        for pid in list(self._pids):
+            if self._stopping:
+                return
+            self._signal(pid, signal.SIGTERM)
+            self._wait(pid)
+            self._spawn()
+
+    def _reap(self) -> None:
+        while self._pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._pids.clear()
+                return
+            if pid == 0:
+                return
+            self._pids.discard(pid)
+            exit_code = os.waitstatus_to_exitcode(status)
+            if not self._stopping and exit_code != 0:
+                logger.warning("Worker [%d] exited with %d; replacing it", pid, exit_code)
+
+    def _wait(self, pid: int) -> None:
+        """Wait for one worker to exit, killing it after the graceful timeout."""
+        deadline = time.monotonic() + self.graceful_timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done == pid:
+                self._pids.discard(pid)
+                return
+            time.sleep(0.1)
+
+        logger.warning("Worker [%d] did not stop within %.0fs; killing it", pid, self.graceful_timeout)
+        self._signal(pid, signal.SIGKILL)
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+        self._pids.discard(pid)
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def default_workers(db_settings: DatabaseSettings) -> tuple[int, int]:
+    """Worker count for an unset ``WEB_CONCURRENCY``, and the CPUs it was derived from."""
+    cpus = available_cpus()
+    limit = max_workers(
+        db_settings.DB_CONNECTION_BUDGET,
+        db_settings.reserved_connections_per_worker,
+        db_settings.DB_MIN_POOL_SIZE,
+    )
+    return min(cpus, limit), cpus
+
+
+def main() -> None:
+    settings = ServerSettings()
+    db_settings = DatabaseSettings()  # type: ignore
+    workers, cpus = settings.WEB_CONCURRENCY, None
+    if not workers:
+        workers, cpus = default_workers(db_settings)
+    # the app reads this when it is imported below, to size its share of the pool
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    from src.app import app
+
+    config = uvicorn.Config(
+        app,
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        limit_max_requests=settings.WORKER_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT,
+    )
+    if cpus is not None and workers < cpus:
+        # after uvicorn.Config, which sets up logging
+        logger.info(
+            "Running %d workers on %d CPUs: DB_CONNECTION_BUDGET=%d leaves each a pool of "
+            "at least DB_MIN_POOL_SIZE=%d",
+            workers,
+            cpus,
+            db_settings.DB_CONNECTION_BUDGET,
+            db_settings.DB_MIN_POOL_SIZE,
+        )
+    sock = config.bind_socket()
+    try:
+        Supervisor(
+            config, [sock], workers, graceful_timeout=settings.WORKER_GRACEFUL_TIMEOUT
+        ).run()
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from uuid import UUID
+
+from src.repositories.user import UserRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingActivity:
+    last_login_at: datetime
+    count: int = 0
+
+
+class LoginActivityRecorder:
+    """
+    Write-behind buffer for login activity.
+
+    Logins are coalesced per user in memory and written in batches by a
+    background thread, either every ``flush_interval`` seconds or as soon as
+    ``max_pending`` distinct users are buffered. Call ``stop()`` at shutdown to
+    flush whatever is left.
+    """
+
+    def __init__(
+        self,
+        user_repository: UserRepository | None = None,
+        max_pending: int = 500,
+        flush_interval: float = 5.0,
+    ):
+        self.user_repository = user_repository or UserRepository()
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+
+        self._pending: dict[UUID, _PendingActivity] = {}
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record_login(self, user_id: UUID, at: datetime | None = None) -> None:
+        """Buffer a successful login; never touches the database."""
+        at = at or datetime.now(timezone.utc)
+
+        with self._lock:
+            entry = self._pending.get(user_id)
+            if entry is None:
+                entry = self._pending[user_id] = _PendingActivity(last_login_at=at)
+            elif at > entry.last_login_at:
+                entry.last_login_at = at
+            entry.count += 1
+            pending = len(self._pending)
+
+        if pending >= self.max_pending:
+            self._flush_requested.set()
+
+    def flush(self) -> int:
+        """
+        Write all buffered activity now, at most ``max_pending`` users per
+        statement. Returns the number of users flushed; a failed chunk and the
+        ones after it are requeued.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+
+        items = list(batch.items())
+        flushed = 0
+        for start in range(0, len(items), self.max_pending):
+            chunk = items[start : start + self.max_pending]
+            try:
+                self.user_repository.record_logins(
+                    [(user_id, entry.last_login_at, entry.count) for user_id, entry in chunk]
+                )
+            except Exception:
+                logger.exception("Failed to flush login activity for %d users", len(items) - start)
+                self._requeue(dict(items[start:]))
+                break
+            flushed += len(chunk)
+
+        return flushed
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None:
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="login-activity-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and flush any remaining activity."""
+        self._stopping.set()
+        self._flush_requested.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+
+    def _requeue(self, batch: dict[UUID, _PendingActivity]) -> None:
+        with self._lock:
+            for user_id, failed in batch.items():
+                entry = self._pending.get(user_id)
+                if entry is None:
+                    self._pending[user_id] = failed
+                    continue
+                entry.count += failed.count
+                if failed.last_login_at > entry.last_login_at:
+                    entry.last_login_at = failed.last_login_at
@@ -1,21 +1,29 @@
 from datetime import timedelta, datetime, timezone
-from typing import Any
+from typing import Any, TypedDict
 
 from jose import jwt
 from jose.exceptions import JWTError, ExpiredSignatureError
-from pydantic import BaseModel, Field
 
 from src.db.models import User
 from src.settings import AuthSettings
 from src.services.status import InternalStatus, Result
 from src.services.user import UserService
+from src.services.activity import LoginActivityRecorder
+from src.services.cache import TTLCache
+from src.services.invalidation import UserInvalidation
+from src.services.keyring import KeyRing
 
 
-class JWTPayload(BaseModel):
-    """JWT token payload structure."""
+class JWTPayload(TypedDict):
+    """
+    JWT token payload structure.
 
-    username: str = Field(..., description="Username included in the payload")
-    exp: datetime = Field(..., description="The expiration time of the token")
+    A plain dict rather than a model: it is built and checked on every
+    authenticated request, and python-jose already validates ``exp``.
+    """
+
+    username: str
+    exp: datetime
 
 
 class AuthenticationService:
@@ -25,66 +33,131 @@ class AuthenticationService:
         self,
         settings: AuthSettings | None = None,
         user_service: UserService | None = None,
+        activity_recorder: LoginActivityRecorder | None = None,
+        keyring: KeyRing | None = None,
     ):
         """Initialize authentication service with settings and user service."""
         self.settings = settings or AuthSettings()  # type: ignore
+        if keyring is None and self.settings.JWT_KEYRING_FILE:
+            keyring = KeyRing(
+                self.settings.JWT_KEYRING_FILE,
+                reload_interval=self.settings.jwt_keyring_reload_seconds,
+            )
+        self.keyring = keyring
         self.user_service = user_service or UserService()
+        self.activity_recorder = activity_recorder
+        self.principal_cache: TTLCache[str, User] = TTLCache(
+            self.settings.principal_cache_seconds
+        )
 
-    def create_jwt_payload(self, username: str) -> dict[str, Any]:
+    def create_jwt_payload(self, username: str) -> JWTPayload:
         """Create a JWT payload dictionary."""
         now_utc = datetime.now(timezone.utc)
         exp = now_utc + timedelta(minutes=self.settings.token_expire_minutes)
-        return JWTPayload(username=username, exp=exp).model_dump()
+        return {"username": username, "exp": exp}
 
     def create_jwt_token(self, username: str) -> str:
-        """Generate a JWT token for a user."""
+        """
+        Generate a JWT token for a user.
+
+        With a key ring the token is signed with its active asymmetric key and
+        carries that key's ``kid``; otherwise the shared ``SECRET_KEY`` is used.
+        """
         payload = self.create_jwt_payload(username)
+        if self.keyring is not None:
+            key = self.keyring.signing_key()
+            return jwt.encode(
+                payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid}
+            )
+
         encoded_jwt = jwt.encode(
             payload, self.settings.SECRET_KEY, algorithm=self.settings.ALGORITHM
         )
         return encoded_jwt
 
-    def get_jwt_username(self, token: str) -> Result[str]:
-        """Extract and validate username from JWT token."""
-        try:
-            payload = jwt.decode(
+    def decode_jwt_token(self, token: str, verify_exp: bool = True) -> dict[str, Any]:
+        """
+        Verify a token's signature and decode its claims.
+
+        Tokens with a ``kid`` header are checked against that key of the ring,
+        using only that key's algorithm. Tokens without one are checked against
+        ``SECRET_KEY``. With a key ring enabled, those are tokens issued before
+        it was, and they are only accepted until ``JWT_LEGACY_TOKENS_UNTIL``;
+        otherwise an expired one could be refreshed indefinitely.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if self.keyring is not None and not self._accepts_legacy_tokens():
+                raise JWTError("Tokens without a signing key id are no longer accepted")
+            return jwt.decode(
                 token,
                 self.settings.SECRET_KEY,
                 algorithms=[self.settings.ALGORITHM],
+                options={"verify_exp": verify_exp},
             )
 
-            jwt_payload = JWTPayload(**payload)
+        key = self.keyring.verification_key(kid) if self.keyring is not None else None
+        if key is None:
+            raise JWTError(f"Unknown signing key '{kid}'")
+        return jwt.decode(
+            token,
+            key.public_key,
+            algorithms=[key.algorithm],
+            options={"verify_exp": verify_exp},
+        )
 
-            if not jwt_payload.username:
-                return Result.failure(
-                    InternalStatus.INVALID_TOKEN, "Username not found in token"
-                )
+    def _accepts_legacy_tokens(self) -> bool:
+        until = self.settings.JWT_LEGACY_TOKENS_UNTIL
+        if until is None:
+            return False
+        if until.tzinfo is None:
+            until = until.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) < until
 
-            return Result.success(jwt_payload.username)
+    def get_jwks(self) -> dict[str, Any]:
+        """Public keys downstream services can verify tokens with locally."""
+        if self.keyring is None:
+            return {"keys": []}
+        return self.keyring.jwks()
 
+    def get_jwt_username(self, token: str) -> Result[str]:
+        """Extract and validate username from JWT token."""
+        try:
+            payload = self.decode_jwt_token(token)
         except ExpiredSignatureError:
             return Result.failure(InternalStatus.TOKEN_EXPIRED, "Token has expired")
         except JWTError as e:
+            # str(e): a result holding the error would keep its traceback alive
+            return Result.failure(InternalStatus.INVALID_TOKEN, "Invalid token: %s", str(e))
+        except Exception as e:
             return Result.failure(
-                InternalStatus.INVALID_TOKEN, f"Invalid token: {str(e)}"
+                InternalStatus.INVALID_TOKEN, "Token validation error: %s", str(e)
             )
-        except Exception as e:
+
+        username = payload.get("username")
+        if not username or not isinstance(username, str):
+            return Result.failure(
+                InternalStatus.INVALID_TOKEN, "Username not found in token"
+            )
+        if "exp" not in payload:
             return Result.failure(
-                InternalStatus.INVALID_TOKEN, f"Token validation error: {str(e)}"
+                InternalStatus.INVALID_TOKEN, "Expiration not found in token"
             )
 
+        return Result.success(username)
+
     def verify_jwt_token(self, token: str) -> Result[str]:
         """Verify JWT token and return username if valid."""
         return self.get_jwt_username(token)
 
     def verify_credentials(self, username: str, plain_password: str) -> Result[User]:
         """Verify user credentials by checking username and password."""
-        # Use UserService to get user
-        user_result = self.user_service.get_user_by_username(username)
+        # Use UserService to get the columns a password check needs
+        user_result = self.user_service.get_user_credentials(username)
 
         if user_result.is_failure:
             return Result.failure(
-                InternalStatus.USER_NOT_FOUND, f"User '{username}' not found"
+                InternalStatus.USER_NOT_FOUND, "User '%s' not found", username
             )
 
         user = user_result.data
@@ -99,7 +172,11 @@ class AuthenticationService:
         credentials_result = self.verify_credentials(username, plain_password)
 
         if credentials_result.is_failure:
-            return Result.failure(credentials_result.status, credentials_result.message)
+            # failures carry no data, so they can be passed on as they are
+            return credentials_result  # type: ignore[return-value]
+
+        if self.activity_recorder is not None:
+            self.activity_recorder.record_login(credentials_result.data.id)  # type: ignore
 
         token = self.create_jwt_token(username)
         return Result.success(token, "Authentication successful")
@@ -109,17 +186,30 @@ class AuthenticationService:
         username_result = self.get_jwt_username(token)
 
         if username_result.is_failure:
-            return Result.failure(username_result.status, username_result.message)
+            return username_result  # type: ignore[return-value]
 
-        user_result = self.user_service.get_user_by_username(username_result.data)  # type: ignore
+        username: str = username_result.data  # type: ignore
+        cached_user = self.principal_cache.get(username)
+        if cached_user is not None:
+            return Result.success(cached_user, "User retrieved from token")
+
+        user_result = self.user_service.get_user_by_username(username)
 
         if user_result.is_failure:
             return Result.failure(
                 InternalStatus.USER_NOT_FOUND, "User associated with token not found"
             )
 
+        self.principal_cache.set(username, user_result.data)  # type: ignore
         return Result.success(user_result.data, "User retrieved from token")
 
+    def on_user_invalidated(self, event: UserInvalidation) -> None:
+        """Drop a changed or deleted user from the principal cache."""
+        for username in event.usernames:
+            self.principal_cache.pop(username)
+        # a rename leaves the user cached under a username the event doesn't name
+        self.principal_cache.discard_where(lambda user: str(user.id) == event.user_id)
+
     def refresh_token(self, old_token: str) -> Result[str]:
         """
         Refresh an expired or soon-to-expire token.
@@ -135,17 +225,12 @@ class AuthenticationService:
         if username_result.is_failure:
             # Allow refresh even if token is expired
             if username_result.status != InternalStatus.TOKEN_EXPIRED:
-                return Result.failure(username_result.status, username_result.message)
+                return username_result
 
             # For expired tokens, we need to decode without verification
             # This is safe for refresh operations
             try:
-                payload = jwt.decode(
-                    old_token,
-                    self.settings.SECRET_KEY,
-                    algorithms=[self.settings.ALGORITHM],
-                    options={"verify_exp": False},
-                )
+                payload = self.decode_jwt_token(old_token, verify_exp=False)
                 username = payload.get("username")
 
                 if not username:
@@ -156,7 +241,8 @@ class AuthenticationService:
             except JWTError as e:
                 return Result.failure(
                     InternalStatus.INVALID_TOKEN,
-                    f"Cannot refresh invalid token: {str(e)}",
+                    "Cannot refresh invalid token: %s",
+                    str(e),
                 )
         else:
             username = username_result.data
@@ -166,7 +252,7 @@ class AuthenticationService:
 
         if user_result.is_failure:
             return Result.failure(
-                InternalStatus.USER_NOT_FOUND, f"User '{username}' no longer exists"
+                InternalStatus.USER_NOT_FOUND, "User '%s' no longer exists", username
             )
 
         # Generate new token
@@ -0,0 +1,54 @@
+import threading
+import time
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Small thread-safe in-process cache with per-entry expiry and a size cap."""
+
+    def __init__(self, ttl_seconds: float, max_size: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: dict[K, tuple[float, V]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_size:
+                # dicts keep insertion order, so this drops the oldest entry
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[V], bool]) -> None:
+        """Drop every entry whose value matches ``predicate``."""
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,256 @@
+import json
+import logging
+import select
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import text
+
+from src.db import DatabaseManager, get_database
+
+
+logger = logging.getLogger(__name__)
+
+PayloadHandler = Callable[[str], None]
+
+
+@dataclass(frozen=True)
+class UserInvalidation:
+    """
+    A user was created, changed or deleted; caches holding it must drop it.
+
+    ``claimed`` is set when ``usernames`` were newly taken, by a create or a
+    rename, as opposed to a user that kept its name.
+    """
+
+    user_id: str
+    usernames: tuple[str, ...] = ()
+    claimed: bool = False
+
+
+class InvalidationTransport(ABC):
+    """Carries serialised invalidation messages between workers."""
+
+    @abstractmethod
+    def publish(self, payload: str) -> None: ...
+
+    @abstractmethod
+    def start(self, on_payload: PayloadHandler, on_reconnect: Callable[[], None]) -> None:
+        """Begin delivering payloads; ``on_reconnect`` is called when messages may have been missed."""
+
+    @abstractmethod
+    def stop(self) -> None: ...
+
+
+class LoopbackTransport(InvalidationTransport):
+    """
+    In-process transport. Several buses sharing one instance behave like
+    separate workers, which is what tests need.
+    """
+
+    def __init__(self):
+        self._handlers: list[PayloadHandler] = []
+        self._lock = threading.Lock()
+
+    def publish(self, payload: str) -> None:
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(payload)
+
+    def start(self, on_payload: PayloadHandler, on_reconnect: Callable[[], None]) -> None:
+        with self._lock:
+            self._handlers.append(on_payload)
+
+    def stop(self) -> None:
+        with self._lock:
+            self._handlers.clear()
+
+
+class PostgresNotifyTransport(InvalidationTransport):
+    """
+    Postgres LISTEN/NOTIFY transport.
+
+    Publishing is a ``pg_notify`` call through the regular session. Listening
+    uses one dedicated connection detached from the pool, polled from a
+    background thread. ``on_reconnect`` fires every time LISTEN is
+    (re-)established, because anything sent while not listening is lost.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager | None = None,
+        channel: str = "user_invalidation",
+        poll_interval: float = 1.0,
+        reconnect_delay: float = 1.0,
+    ):
+        self.db_manager = db_manager or get_database()
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def publish(self, payload: str) -> None:
+        with self.db_manager.session() as session:
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload},
+            )
+
+    def start(self, on_payload: PayloadHandler, on_reconnect: Callable[[], None]) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._listen,
+            args=(on_payload, on_reconnect),
+            name="user-invalidation-listener",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _listen(self, on_payload: PayloadHandler, on_reconnect: Callable[[], None]) -> None:
+        while not self._stopping.is_set():
+            try:
+                # outside the request pool; counted in the worker's reserved connections
+                raw = self.db_manager.dedicated_engine.raw_connection()
+                connection = raw.dbapi_connection
+            except Exception:
+                logger.exception("Invalidation listener could not connect")
+                self._stopping.wait(self.reconnect_delay)
+                continue
+
+            try:
+                connection.autocommit = True  # type: ignore
+                connection.cursor().execute(f'LISTEN "{self.channel}"')  # type: ignore
+                # anything published while we were not listening is lost
+                on_reconnect()
+
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], self.poll_interval)[0]:
+                        connection.poll()  # type: ignore
+                        while connection.notifies:  # type: ignore
+                            on_payload(connection.notifies.pop(0).payload)  # type: ignore
+            except Exception:
+                logger.exception("Invalidation listener lost its connection")
+                self._stopping.wait(self.reconnect_delay)
+            finally:
+                raw.close()
+
+
+class InvalidationBus:
+    """
+    Fans user invalidations out to local subscribers and to other workers.
+
+    Every message carries this bus's ``origin`` and a per-origin sequence
+    number, and ``start()`` announces the origin with sequence number 0.
+    Local subscribers are told immediately on publish. Remote messages are
+    delivered as they arrive, and a gap in a remote origin's sequence (or a
+    transport reconnect) makes every subscriber flush, since at least one
+    invalidation was lost.
+    """
+
+    def __init__(self, transport: InvalidationTransport | None = None):
+        self.transport = transport or LoopbackTransport()
+        self.origin = uuid.uuid4().hex
+
+        self._seq = 0
+        self._last_seen: dict[str, int] = {}
+        self._on_event: list[Callable[[UserInvalidation], None]] = []
+        self._on_flush: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        on_event: Callable[[UserInvalidation], None],
+        on_flush: Callable[[], None],
+    ) -> None:
+        self._on_event.append(on_event)
+        self._on_flush.append(on_flush)
+
+    def publish(self, event: UserInvalidation) -> None:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+
+        self._deliver(event)
+
+        payload = json.dumps(
+            {
+                "origin": self.origin,
+                "seq": seq,
+                "user_id": event.user_id,
+                "usernames": list(event.usernames),
+                "claimed": event.claimed,
+                "sent_at": time.time(),
+            }
+        )
+        try:
+            self.transport.publish(payload)
+        except Exception:
+            # the skipped sequence number makes other workers flush
+            logger.exception("Failed to publish invalidation for user %s", event.user_id)
+
+    def start(self) -> None:
+        self.transport.start(self._receive, self.flush)
+        payload = json.dumps({"origin": self.origin, "seq": 0, "sent_at": time.time()})
+        try:
+            self.transport.publish(payload)
+        except Exception:
+            # only costs other workers the check on this origin's first message
+            logger.exception("Failed to announce invalidation origin %s", self.origin)
+
+    def stop(self) -> None:
+        self.transport.stop()
+
+    def flush(self) -> None:
+        for on_flush in self._on_flush:
+            on_flush()
+
+    def _receive(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            origin, seq = message["origin"], int(message["seq"])
+            event = None if seq == 0 else UserInvalidation(
+                message["user_id"],
+                tuple(message["usernames"]),
+                bool(message.get("claimed", False)),
+            )
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Dropping malformed invalidation payload: %r", payload)
+            return
+
+        if origin == self.origin:
+            return
+
+        with self._lock:
+            last = self._last_seen.get(origin)
+            if last is not None and seq <= last:
+                return
+            self._last_seen[origin] = seq
+            # An origin first heard from mid-sequence started before this bus
+            # was listening, and what it sent earlier is covered by the flush
+            # on (re)connect. Only an origin whose hello was seen can skip.
+            gap = last is not None and seq != last + 1
+
+        if gap:
+            logger.warning("Invalidation gap from %s (%s -> %s); flushing caches", origin, last, seq)
+            self.flush()
+        elif event is not None:
+            self._deliver(event)
+
+    def _deliver(self, event: UserInvalidation) -> None:
+        for on_event in self._on_event:
+            on_event(event)
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from jose import jwk
+from jose.backends.base import Key
+
+
+logger = logging.getLogger(__name__)
+
+# python-jose has no EdDSA implementation, so the ring takes RSA and EC keys.
+ASYMMETRIC_ALGORITHMS = frozenset({"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"})
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """One key of the ring, parsed once when the manifest is loaded."""
+
+    kid: str
+    algorithm: str
+    private_key: Key
+    public_key: Key
+    active_from: datetime
+    retire_after: datetime | None
+
+    def is_retired(self, now: datetime) -> bool:
+        return self.retire_after is not None and now >= self.retire_after
+
+    def public_jwk(self) -> dict[str, Any]:
+        return {**self.public_key.to_dict(), "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class KeyRing:
+    """
+    Asymmetric JWT signing keys with scheduled rotation.
+
+    Keys are listed in a JSON manifest::
+
+        {"keys": [{"kid": "2026-10", "alg": "RS256", "private_key_file": "2026-10.pem",
+                   "active_from": "2026-10-01T00:00:00Z",
+                   "retire_after": "2027-01-01T00:00:00Z"}]}
+
+    Relative key paths resolve against the manifest's directory. Tokens are
+    signed with the most recently activated key. Every key that is not
+    retired, including keys scheduled to activate later, is published in the
+    JWKS and accepted for verification, so verifiers learn a key before it
+    starts signing. The manifest is re-read when it changes, at most every
+    ``reload_interval`` seconds; if that reload fails, the error is logged
+    and the ring keeps the keys it last loaded successfully.
+    """
+
+    def __init__(self, manifest_path: str, reload_interval: float = 60.0):
+        self.manifest_path = Path(manifest_path)
+        self.reload_interval = reload_interval
+
+        self._keys: dict[str, SigningKey] = {}
+        self._jwks: dict[str, Any] = {"keys": []}
+        self._mtime = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> None:
+        """Parse the manifest and every key it lists."""
+        mtime = os.stat(self.manifest_path).st_mtime
+        manifest = json.loads(self.manifest_path.read_text())
+        keys: dict[str, SigningKey] = {}
+
+        for entry in manifest["keys"]:
+            algorithm = entry["alg"]
+            if algorithm not in ASYMMETRIC_ALGORITHMS:
+                raise ValueError(f"Unsupported signing algorithm '{algorithm}' for key '{entry['kid']}'")
+
+            private_key = jwk.construct(
+                (self.manifest_path.parent / entry["private_key_file"]).read_text(), algorithm
+            )
+            keys[entry["kid"]] = SigningKey(
+                kid=entry["kid"],
+                algorithm=algorithm,
+                private_key=private_key,
+                public_key=private_key.public_key(),
+                active_from=_parse_time(entry["active_from"]),  # type: ignore
+                retire_after=_parse_time(entry.get("retire_after")),
+            )
+
+        with self._lock:
+            self._keys = keys
+            self._jwks = {"keys": [key.public_jwk() for key in keys.values()]}
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+
+    def signing_key(self) -> SigningKey:
+        """The newest key whose activation time has passed."""
+        self._maybe_reload()
+        now = datetime.now(timezone.utc)
+        candidates = [
+            key
+            for key in self._keys.values()
+            if key.active_from <= now and not key.is_retired(now)
+        ]
+        if not candidates:
+            raise RuntimeError("No active JWT signing key in the key ring")
+        return max(candidates, key=lambda key: key.active_from)
+
+    def verification_key(self, kid: str) -> SigningKey | None:
+        self._maybe_reload()
+        key = self._keys.get(kid)
+        if key is None or key.is_retired(datetime.now(timezone.utc)):
+            return None
+        return key
+
+    def jwks(self) -> dict[str, Any]:
+        """JWK Set of the public keys that are not retired."""
+        self._maybe_reload()
+        now = datetime.now(timezone.utc)
+        retired = {kid for kid, key in self._keys.items() if key.is_retired(now)}
+        return {"keys": [entry for entry in self._jwks["keys"] if entry["kid"] not in retired]}
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            if os.stat(self.manifest_path).st_mtime != self._mtime:
+                self.reload()
+        except Exception:
+            # a half-written manifest or a missing key file must not take
+            # signing and verification down; retried at the next interval
+            logger.exception(
+                "Failed to reload JWT key ring from %s; keeping the last good keys",
+                self.manifest_path,
+            )
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import math
+import threading
+from typing import Iterable
+
+from src.repositories.user import UserRepository
+from src.services.invalidation import UserInvalidation
+
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Sized for ``capacity`` items at ``false_positive_rate``; positions come from
+    double hashing of one 128-bit BLAKE2b digest. Not thread-safe on its own.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def estimated_false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class UsernameIndex:
+    """
+    In-process membership index of taken usernames.
+
+    ``might_contain`` returning ``False`` means the username is definitely
+    free; ``True`` means it is probably taken and must be confirmed against the
+    database. The filter is built from a streaming scan on ``start()`` and
+    rebuilt every ``rebuild_interval`` seconds, when it has grown past twice its
+    target false-positive rate, or after the invalidation bus lost messages.
+    Usernames are added as they are claimed, by creates and renames seen on
+    the invalidation bus. Deleted
+    usernames cannot be removed and only cost a database check until the next
+    rebuild. Until the first build completes, every name is reported as
+    probably taken.
+    """
+
+    def __init__(
+        self,
+        user_repository: UserRepository | None = None,
+        false_positive_rate: float = 0.01,
+        min_capacity: int = 100_000,
+        headroom: float = 2.0,
+        rebuild_interval: float = 6 * 60 * 60,
+        seed_batch_size: int = 10_000,
+    ):
+        self.user_repository = user_repository or UserRepository()
+        self.false_positive_rate = false_positive_rate
+        self.min_capacity = min_capacity
+        self.headroom = headroom
+        self.rebuild_interval = rebuild_interval
+        self.seed_batch_size = seed_batch_size
+
+        self._filter: BloomFilter | None = None
+        self._building: BloomFilter | None = None
+        self._lock = threading.Lock()
+        self._rebuild_requested = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def might_contain(self, username: str) -> bool:
+        with self._lock:
+            if self._filter is None:
+                return True
+            return username in self._filter
+
+    def add(self, username: str) -> None:
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(username)
+            if self._building is not None:
+                self._building.add(username)
+
+        if (
+            self._filter is not None
+            and self._filter.estimated_false_positive_rate > 2 * self.false_positive_rate
+        ):
+            self._rebuild_requested.set()
+
+    def on_user_invalidated(self, event: UserInvalidation) -> None:
+        # password changes and deletes name a username that is already in the
+        # filter; adding it again would only inflate count
+        if not event.claimed:
+            return
+        for username in event.usernames:
+            self.add(username)
+
+    def on_flush(self) -> None:
+        """Creates may have been missed: stop answering from the filter and rebuild."""
+        with self._lock:
+            self._filter = None
+        self._rebuild_requested.set()
+
+    def rebuild(self) -> None:
+        """Build a fresh filter from a streaming scan and swap it in."""
+        capacity = max(self.min_capacity, int(self.user_repository.count() * self.headroom))
+        fresh = BloomFilter(capacity, self.false_positive_rate)
+        with self._lock:
+            self._building = fresh
+
+        try:
+            batch: list[str] = []
+            for username in self.user_repository.iter_usernames(self.seed_batch_size):
+                batch.append(username)
+                if len(batch) >= self.seed_batch_size:
+                    self._add_batch(fresh, batch)
+                    batch = []
+            self._add_batch(fresh, batch)
+        except Exception:
+            with self._lock:
+                self._building = None
+            raise
+
+        with self._lock:
+            self._filter = fresh
+            self._building = None
+
+    def start(self) -> None:
+        """Build the filter in a background thread and keep it fresh."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._rebuild_requested.set()
+        self._thread = threading.Thread(
+            target=self._run, name="username-index-builder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._rebuild_requested.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            bloom = self._filter
+            if bloom is None:
+                return {"ready": False}
+            return {
+                "ready": True,
+                "entries": bloom.count,
+                "capacity": bloom.capacity,
+                "bits": bloom.size,
+                "hashes": bloom.hashes,
+                "memory_bytes": bloom.memory_bytes,
+                "estimated_false_positive_rate": round(bloom.estimated_false_positive_rate, 6),
+            }
+
+    def _add_batch(self, bloom: BloomFilter, usernames: list[str]) -> None:
+        with self._lock:
+            for username in usernames:
+                bloom.add(username)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._rebuild_requested.wait(self.rebuild_interval)
+            self._rebuild_requested.clear()
+            if self._stopping.is_set():
+                return
+            try:
+                self.rebuild()
+            except Exception:
+                logger.exception("Failed to build the username index")
+                self._stopping.wait(5.0)
+                self._rebuild_requested.set()
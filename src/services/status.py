@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Generic, TypeVar
+from typing import Any, Generic, TypeVar
 from enum import StrEnum
 
 T = TypeVar("T")
@@ -9,34 +9,49 @@ class InternalStatus(StrEnum):
     SUCCESS = "success"
     USER_NOT_FOUND = "user_not_found_in_db"
     USER_ALREADY_EXISTS = "user_already_exists"
+    CONCURRENT_MODIFICATION = "concurrent_modification"
     DB_CONNECTION_FAILED = "db_connection_failed"
     WRONG_PASSWORD = "wrong_password"
     INVALID_TOKEN = "invalid_token"
     TOKEN_EXPIRED = "token_expired"
 
 
-@dataclass
+@dataclass(slots=True)
 class Result(Generic[T]):
     """
     A result type that represents either success with data or failure with status.
+
+    Messages are ``%``-style templates formatted only when ``message`` is
+    read, so results whose message nobody looks at never build the string.
     """
 
     status: InternalStatus
     data: T | None = None
-    message: str | None = None
+    template: str | None = None
+    args: tuple[Any, ...] = ()
+
+    @property
+    def message(self) -> str | None:
+        if self.args:
+            return self.template % self.args  # type: ignore[operator]
+        return self.template
 
     @property
     def is_success(self) -> bool:
-        return self.status == InternalStatus.SUCCESS
+        return self.status is InternalStatus.SUCCESS
 
     @property
     def is_failure(self) -> bool:
-        return not self.is_success
+        return self.status is not InternalStatus.SUCCESS
 
     @classmethod
-    def success(cls, data: T | None = None, message: str | None = None) -> "Result[T]":
-        return cls(status=InternalStatus.SUCCESS, data=data, message=message)
+    def success(
+        cls, data: T | None = None, message: str | None = None, *args: Any
+    ) -> "Result[T]":
+        return cls(InternalStatus.SUCCESS, data, message, args)
 
     @classmethod
-    def failure(cls, status: InternalStatus, message: str | None = None) -> "Result[T]":
-        return cls(status=status, data=None, message=message)
+    def failure(
+        cls, status: InternalStatus, message: str | None = None, *args: Any
+    ) -> "Result[T]":
+        return cls(status, None, message, args)
@@ -6,6 +6,8 @@ from passlib.context import CryptContext
 from src.repositories.user import UserRepository
 from src.db.models import User
 from src.services.status import InternalStatus, Result
+from src.services.invalidation import InvalidationBus, UserInvalidation
+from src.services.membership import UsernameIndex
 
 
 class UserService:
@@ -13,21 +15,35 @@ class UserService:
 
     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-    def __init__(self, user_repository: UserRepository | None = None):
+    def __init__(
+        self,
+        user_repository: UserRepository | None = None,
+        invalidation_bus: InvalidationBus | None = None,
+        username_index: UsernameIndex | None = None,
+    ):
         """
         Initialize UserService.
         
         Args:
             user_repository: Optional UserRepository instance for dependency injection
+            invalidation_bus: Optional bus told about every user mutation
+            username_index: Optional membership index for availability checks
         """
         self.user_repository = user_repository or UserRepository()
+        self.invalidation_bus = invalidation_bus
+        self.username_index = username_index
+
+    def _invalidate(self, user_id: str, *usernames: str, claimed: bool = False) -> None:
+        if self.invalidation_bus is not None:
+            self.invalidation_bus.publish(UserInvalidation(str(user_id), usernames, claimed))
 
     def register_user(self, username: str, plain_password: str) -> Result[User]:
         """Register a new user with the given credentials."""
         if self.user_repository.exists(username):
             return Result.failure(
                 InternalStatus.USER_ALREADY_EXISTS,
-                f"Username '{username}' is already taken"
+                "Username '%s' is already taken",
+                username,
             )
 
         user = User(
@@ -39,6 +55,7 @@ class UserService:
         )
 
         created_user = self.user_repository.create(user)
+        self._invalidate(str(created_user.id), created_user.username, claimed=True)
         return Result.success(created_user, "User registered successfully")
 
     def get_user_by_id(self, user_id: str) -> Result[User]:
@@ -48,7 +65,8 @@ class UserService:
         if not user:
             return Result.failure(
                 InternalStatus.USER_NOT_FOUND,
-                f"User with ID '{user_id}' not found"
+                "User with ID '%s' not found",
+                user_id,
             )
         
         return Result.success(user)
@@ -60,64 +78,138 @@ class UserService:
         if not user:
             return Result.failure(
                 InternalStatus.USER_NOT_FOUND,
-                f"User '{username}' not found"
+                "User '%s' not found",
+                username,
             )
         
         return Result.success(user)
 
+    def get_user_credentials(self, username: str) -> Result[User]:
+        """
+        Retrieve a user for a password check only.
+
+        The user is partially loaded (see ``UserRepository.get_credentials_by_username``)
+        and must not be cached or returned to clients.
+        """
+        user = self.user_repository.get_credentials_by_username(username)
+
+        if not user:
+            return Result.failure(
+                InternalStatus.USER_NOT_FOUND,
+                "User '%s' not found",
+                username,
+            )
+
+        return Result.success(user)
+
+    def get_users_by_ids(self, user_ids: list[str]) -> Result[list[User | None]]:
+        """Retrieve several users by ID in request order, with ``None`` for misses."""
+        users = self.user_repository.get_many_by_ids(user_ids)
+        return Result.success(users)
+
+    def get_users_by_usernames(self, usernames: list[str]) -> Result[list[User | None]]:
+        """Retrieve several users by username in request order, with ``None`` for misses."""
+        users = self.user_repository.get_many_by_usernames(usernames)
+        return Result.success(users)
+
     def get_all_users(self) -> Result[list[User]]:
         """Retrieve all users from the database."""
         users = self.user_repository.get_all()
-        return Result.success(users, f"Retrieved {len(users)} users")
+        return Result.success(users, "Retrieved %d users", len(users))
 
     def user_exists(self, username: str) -> bool:
         """Check if a user with the given username exists."""
         return self.user_repository.exists(username)
 
+    def is_username_available(self, username: str) -> Result[bool]:
+        """
+        Check whether a username is free.
+
+        A miss in the username index answers without touching the database;
+        probable hits are confirmed with an indexed existence check. This is
+        advisory: registration still checks the database itself.
+        """
+        if self.username_index is not None and not self.username_index.might_contain(username):
+            return Result.success(True)
+
+        return Result.success(not self.user_repository.exists(username))
+
+    def _write_failure(
+        self, user_id: str, expected_updated_at: datetime | None
+    ) -> Result:
+        """Explain why a single-statement write matched no row."""
+        if expected_updated_at is not None and self.user_repository.get_by_id(user_id):
+            # whoever handed us the stale version may be holding a cached copy
+            self._invalidate(user_id)
+            return Result.failure(
+                InternalStatus.CONCURRENT_MODIFICATION,
+                "User with ID '%s' was modified concurrently",
+                user_id,
+            )
+
+        return Result.failure(
+            InternalStatus.USER_NOT_FOUND,
+            "User with ID '%s' not found",
+            user_id,
+        )
+
     def update_user(
-        self, user_id: str, username: Optional[str] = None, **kwargs
+        self,
+        user_id: str,
+        username: Optional[str] = None,
+        expected_updated_at: datetime | None = None,
+        **kwargs,
     ) -> Result[User]:
-        """Update user information."""
-        try:
-            # Check if user exists
-            existing_user = self.user_repository.get_by_id(user_id)
-            if not existing_user:
+        """
+        Update user information in a single statement.
+
+        Pass the ``updated_at`` the caller last saw as ``expected_updated_at``
+        to reject the write if someone else changed the user in between.
+        """
+        # If updating username, check if new username is taken by someone else
+        if username:
+            holder = self.user_repository.get_by_username(username)
+            if holder is not None and str(holder.id) != str(user_id):
                 return Result.failure(
-                    InternalStatus.USER_NOT_FOUND,
-                    f"User with ID '{user_id}' not found"
+                    InternalStatus.USER_ALREADY_EXISTS,
+                    "Username '%s' is already taken",
+                    username,
                 )
+            kwargs["username"] = username
 
-            # If updating username, check if new username is already taken
-            if username and username != existing_user.username:
-                if self.user_repository.exists(username):
-                    return Result.failure(
-                        InternalStatus.USER_ALREADY_EXISTS,
-                        f"Username '{username}' is already taken"
-                    )
-                kwargs["username"] = username
-
-            # Add updated_at timestamp
-            kwargs["updated_at"] = datetime.now(timezone.utc)
+        # Add updated_at timestamp
+        kwargs["updated_at"] = datetime.now(timezone.utc)
 
-            updated_user = self.user_repository.update(user_id, **kwargs)
-            return Result.success(updated_user, "User updated successfully")
+        updated_user = self.user_repository.update(
+            user_id, expected_updated_at=expected_updated_at, **kwargs
+        )
+        if updated_user is None:
+            return self._write_failure(user_id, expected_updated_at)
 
-        except ValueError:
-            return Result.failure(
-                InternalStatus.USER_NOT_FOUND,
-                f"User with ID '{user_id}' not found"
-            )
+        self._invalidate(user_id, updated_user.username, claimed=bool(username))
+        return Result.success(updated_user, "User updated successfully")
 
     def change_password(
-        self, user_id: str, old_password: str, new_password: str
+        self,
+        user_id: str,
+        old_password: str,
+        new_password: str,
+        current_user: User | None = None,
     ) -> Result[None]:
-        """Change a user's password after verifying the old password."""
-        user = self.user_repository.get_by_id(user_id)
+        """
+        Change a user's password after verifying the old password.
+
+        ``current_user`` skips re-reading a user the caller already loaded; the
+        write is then conditional on that copy's ``updated_at``, so a stale
+        copy is reported as a concurrent modification instead of being trusted.
+        """
+        user = current_user or self.user_repository.get_by_id(user_id)
         
         if not user:
             return Result.failure(
                 InternalStatus.USER_NOT_FOUND,
-                f"User with ID '{user_id}' not found"
+                "User with ID '%s' not found",
+                user_id,
             )
 
         # Verify old password
@@ -129,45 +221,46 @@ class UserService:
 
         # Hash and update new password
         new_password_hash = self.pwd_context.hash(new_password)
-        success = self.user_repository.update_password(user_id, new_password_hash)
+        updated_user = self.user_repository.update_password(
+            user_id,
+            new_password_hash,
+            updated_at=datetime.now(timezone.utc),
+            expected_updated_at=user.updated_at,
+        )
 
-        if not success:
-            return Result.failure(
-                InternalStatus.USER_NOT_FOUND,
-                f"Failed to update password for user '{user_id}'"
-            )
-        
+        if updated_user is None:
+            return self._write_failure(user_id, user.updated_at)
+
+        self._invalidate(user_id, updated_user.username)
         return Result.success(message="Password changed successfully")
 
     def reset_password(self, user_id: str, new_password: str) -> Result[None]:
         """Reset a user's password without requiring the old password."""
-        if not self.user_repository.get_by_id(user_id):
-            return Result.failure(
-                InternalStatus.USER_NOT_FOUND,
-                f"User with ID '{user_id}' not found"
-            )
-
         new_password_hash = self.pwd_context.hash(new_password)
-        success = self.user_repository.update_password(user_id, new_password_hash)
+        updated_user = self.user_repository.update_password(
+            user_id, new_password_hash, updated_at=datetime.now(timezone.utc)
+        )
 
-        if not success:
+        if updated_user is None:
             return Result.failure(
                 InternalStatus.USER_NOT_FOUND,
-                f"Failed to reset password for user '{user_id}'"
+                "User with ID '%s' not found",
+                user_id,
             )
-        
+
+        self._invalidate(user_id, updated_user.username)
         return Result.success(message="Password reset successfully")
 
-    def delete_user(self, user_id: str) -> Result[None]:
+    def delete_user(
+        self, user_id: str, expected_updated_at: datetime | None = None
+    ) -> Result[None]:
         """Delete a user from the database."""
-        success = self.user_repository.delete(user_id)
-        
-        if not success:
-            return Result.failure(
-                InternalStatus.USER_NOT_FOUND,
-                f"User with ID '{user_id}' not found"
-            )
+        deleted = self.user_repository.delete(user_id, expected_updated_at)
         
+        if deleted is None:
+            return self._write_failure(user_id, expected_updated_at)
+
+        self._invalidate(user_id, deleted[1])
         return Result.success(message="User deleted successfully")
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
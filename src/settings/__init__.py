@@ -1,3 +1,8 @@
-from src.settings.config import AuthSettings, DatabaseSettings
+from src.settings.config import (
+    AuthSettings,
+    DatabaseSettings,
+    ServerSettings,
+    TrafficRecorderSettings,
+)
 
-__all__ = ["AuthSettings", "DatabaseSettings"]
+__all__ = ["AuthSettings", "DatabaseSettings", "ServerSettings", "TrafficRecorderSettings"]
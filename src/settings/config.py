@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic_settings import BaseSettings
 
 
@@ -5,6 +7,13 @@ class AuthSettings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     token_expire_minutes: int
+    principal_cache_seconds: float = 5.0
+    # manifest of asymmetric signing keys; tokens use SECRET_KEY when unset
+    JWT_KEYRING_FILE: str | None = None
+    jwt_keyring_reload_seconds: float = 60.0
+    # with a key ring, tokens without a kid (signed with SECRET_KEY) are accepted
+    # until this time (UTC if no offset is given) and rejected when it is unset
+    JWT_LEGACY_TOKENS_UNTIL: datetime | None = None
 
     class Config:
         env_file = ".env"
@@ -12,3 +21,46 @@ class AuthSettings(BaseSettings):
 
 class DatabaseSettings(BaseSettings):
     DATABASE_URL: str
+    DB_POOL_TIMEOUT: float = 5.0
+    DB_BREAKER_FAILURE_RATE: float = 0.5
+    DB_BREAKER_SLOW_CHECKOUT_SECONDS: float = 1.0
+    DB_BREAKER_OPEN_SECONDS: float = 10.0
+    DB_SHED_CHECKOUT_WAIT_SECONDS: float = 0.5
+    # set once scripts/migrate_user_partitions.py --cutover has run
+    USER_TABLE_PARTITIONED: bool = False
+    DB_QUERY_COUNT_HEADER: bool = False
+    DB_QUERY_BUDGET_STRICT: bool = False
+    # "postgres" (LISTEN/NOTIFY, needed with several workers) or "loopback"
+    CACHE_INVALIDATION_TRANSPORT: str = "postgres"
+    # connections all workers together may hold; keep it below max_connections
+    DB_CONNECTION_BUDGET: int = 20
+    # python -m src.server runs fewer workers than CPUs rather than give each
+    # a smaller pool than this
+    DB_MIN_POOL_SIZE: int = 3
+
+    @property
+    def reserved_connections_per_worker(self) -> int:
+        """Connections a worker opens outside its pool: the username index scan,
+        plus the LISTEN connection of the postgres invalidation transport."""
+        return 2 if self.CACHE_INVALIDATION_TRANSPORT == "postgres" else 1
+
+
+class TrafficRecorderSettings(BaseSettings):
+    # recording is off unless a path is set
+    TRAFFIC_RECORD_PATH: str | None = None
+    TRAFFIC_SAMPLE_RATE: float = 0.01
+    TRAFFIC_RECORD_MAX_BYTES: int = 50 * 1024 * 1024
+    TRAFFIC_RECORD_BACKUPS: int = 5
+
+
+class ServerSettings(BaseSettings):
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # worker processes (also what `uvicorn --workers` defaults to); when unset,
+    # python -m src.server runs one per CPU, capped by the connection budget
+    WEB_CONCURRENCY: int | None = None
+    # threads per worker for sync endpoints; twice its pool size when unset
+    WORKER_THREADS: int | None = None
+    # recycle a worker after this many requests; 0 keeps workers forever
+    WORKER_MAX_REQUESTS: int = 0
+    WORKER_GRACEFUL_TIMEOUT: float = 30.0
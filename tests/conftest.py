@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+# The app builds its engine and services at import time, so point it at a
+# throwaway SQLite file before any test module imports it.
+_database_dir = tempfile.mkdtemp(prefix="agentr-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ["CACHE_INVALIDATION_TRANSPORT"] = "loopback"
+os.environ["DB_QUERY_BUDGET_STRICT"] = "true"
+os.environ["DB_QUERY_COUNT_HEADER"] = "true"
+os.environ.pop("WEB_CONCURRENCY", None)
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("token_expire_minutes", "5")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from main import app  # noqa: E402
+from src.db import get_database  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    SQLModel.metadata.create_all(get_database().engine)
+    return TestClient(app)
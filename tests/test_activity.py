@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+from src.services.activity import LoginActivityRecorder
+
+
+class FakeRepository:
+    def __init__(self, fail_after: int | None = None):
+        self.calls: list[list[tuple[UUID, datetime, int]]] = []
+        self.fail_after = fail_after
+
+    def record_logins(self, activity):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise ConnectionError("database is down")
+        self.calls.append(list(activity))
+        return len(activity)
+
+
+def make_recorder(repository: FakeRepository, max_pending: int = 500) -> LoginActivityRecorder:
+    return LoginActivityRecorder(repository, max_pending=max_pending)  # type: ignore[arg-type]
+
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_logins_are_coalesced_per_user():
+    repository = FakeRepository()
+    recorder = make_recorder(repository)
+    alice, bob = uuid4(), uuid4()
+
+    recorder.record_login(alice, T0 + timedelta(seconds=2))
+    recorder.record_login(alice, T0)  # out of order: keeps the latest time
+    recorder.record_login(bob, T0)
+
+    assert recorder.flush() == 2
+    assert sorted(repository.calls[0]) == sorted(
+        [(alice, T0 + timedelta(seconds=2), 2), (bob, T0, 1)]
+    )
+    assert recorder.flush() == 0
+    assert len(repository.calls) == 1
+
+
+def test_flush_is_chunked_by_max_pending():
+    repository = FakeRepository()
+    recorder = make_recorder(repository, max_pending=3)
+    for _ in range(7):
+        recorder.record_login(uuid4(), T0)
+
+    assert recorder.flush() == 7
+    assert [len(call) for call in repository.calls] == [3, 3, 1]
+
+
+def test_failed_chunks_are_requeued_and_merged():
+    repository = FakeRepository(fail_after=1)
+    recorder = make_recorder(repository, max_pending=2)
+    users = [uuid4() for _ in range(5)]
+    for user in users:
+        recorder.record_login(user, T0)
+
+    assert recorder.flush() == 2
+    written = {entry[0] for entry in repository.calls[0]}
+
+    # logins during the outage merge with the requeued ones
+    unwritten = [user for user in users if user not in written]
+    recorder.record_login(unwritten[0], T0 + timedelta(seconds=5))
+
+    repository.fail_after = None
+    assert recorder.flush() == 3
+    retried = {entry[0]: entry for call in repository.calls[1:] for entry in call}
+    assert set(retried) == set(unwritten)
+    assert retried[unwritten[0]][1:] == (T0 + timedelta(seconds=5), 2)
+    assert all(retried[user][2] == 1 for user in unwritten[1:])
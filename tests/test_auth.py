@@ -0,0 +1,103 @@
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import rsa
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from src.routes.dependencies import auth_service
+from src.services.auth import AuthenticationService
+from src.services.keyring import KeyRing
+from src.services.status import InternalStatus
+from src.settings import AuthSettings
+
+
+def test_cached_principal_is_fully_loaded(client: TestClient):
+    username = f"principal_{uuid.uuid4().hex[:12]}"
+    password = "principal-password"
+    client.post("/users/register", json={"username": username, "password": password})
+    token = client.post(
+        "/auth/token", data={"username": username, "password": password}
+    ).json()["access_token"]
+
+    result = auth_service.get_user_from_token(token)
+
+    assert result.is_success
+    cached = auth_service.principal_cache.get(username)
+    assert cached is result.data
+    # would raise DetachedInstanceError on a partially loaded instance
+    assert cached.login_count >= 0
+    assert cached.last_login_at is None or cached.last_login_at.year > 2000
+
+
+def test_credentials_lookup_is_not_cached(client: TestClient):
+    username = f"credentials_{uuid.uuid4().hex[:12]}"
+    password = "credentials-password"
+    client.post("/users/register", json={"username": username, "password": password})
+    auth_service.principal_cache.clear()
+
+    assert auth_service.verify_credentials(username, password).is_success
+    assert auth_service.principal_cache.get(username) is None
+
+
+@pytest.fixture
+def keyring(tmp_path) -> KeyRing:
+    _, private_key = rsa.newkeys(1024)
+    (tmp_path / "k1.pem").write_bytes(private_key.save_pkcs1())
+    manifest = tmp_path / "keys.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "keys": [
+                    {
+                        "kid": "k1",
+                        "alg": "RS256",
+                        "private_key_file": "k1.pem",
+                        "active_from": "2020-01-01T00:00:00Z",
+                    }
+                ]
+            }
+        )
+    )
+    return KeyRing(str(manifest), reload_interval=0)
+
+
+def test_keyring_keeps_last_good_keys_when_reload_fails(keyring: KeyRing):
+    keyring.manifest_path.write_text('{"keys": [')  # half-written
+    os.utime(keyring.manifest_path, (0, 0))
+
+    assert keyring.signing_key().kid == "k1"
+    assert keyring.verification_key("k1") is not None
+    assert [key["kid"] for key in keyring.jwks()["keys"]] == ["k1"]
+
+
+def make_auth(keyring: KeyRing, legacy_until: datetime | None) -> AuthenticationService:
+    settings = AuthSettings(
+        SECRET_KEY="legacy-secret",
+        ALGORITHM="HS256",
+        token_expire_minutes=5,
+        JWT_LEGACY_TOKENS_UNTIL=legacy_until,
+    )  # type: ignore
+    return AuthenticationService(settings, keyring=keyring)
+
+
+def test_legacy_tokens_are_accepted_only_until_the_cutoff(keyring: KeyRing):
+    legacy = jwt.encode(
+        {"username": "alice", "exp": datetime.now(timezone.utc) + timedelta(minutes=5)},
+        "legacy-secret",
+        algorithm="HS256",
+    )
+    in_window = make_auth(keyring, datetime.now(timezone.utc) + timedelta(hours=1))
+    after_window = make_auth(keyring, datetime.now(timezone.utc) - timedelta(hours=1))
+    unset = make_auth(keyring, None)
+
+    assert in_window.get_jwt_username(legacy).data == "alice"
+    assert after_window.get_jwt_username(legacy).status == InternalStatus.INVALID_TOKEN
+    assert unset.get_jwt_username(legacy).status == InternalStatus.INVALID_TOKEN
+    assert after_window.refresh_token(legacy).status == InternalStatus.INVALID_TOKEN
+
+    signed = after_window.create_jwt_token("alice")
+    assert after_window.get_jwt_username(signed).data == "alice"
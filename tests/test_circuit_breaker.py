@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.db import CircuitBreaker, CircuitState
+from src.db.db_manager import is_connectivity_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr("src.db.circuit_breaker.time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = dict(
+        failure_rate_threshold=0.5,
+        minimum_calls=4,
+        window_size=4,
+        open_seconds=10.0,
+        half_open_max_calls=2,
+    )
+    return CircuitBreaker(**{**options, **kwargs})
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.minimum_calls):
+        breaker.record_failure(breaker.allow())  # type: ignore[arg-type]
+
+
+def test_opens_at_the_failure_rate_threshold(clock):
+    breaker = make_breaker()
+
+    breaker.record_success(breaker.allow())  # type: ignore[arg-type]
+    breaker.record_failure(breaker.allow())  # type: ignore[arg-type]
+    breaker.record_success(breaker.allow())  # type: ignore[arg-type]
+    assert breaker.state is CircuitState.CLOSED  # below minimum_calls
+
+    breaker.record_failure(breaker.allow())  # type: ignore[arg-type]  # 2 of 4 failed
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.allow() is None
+
+
+def test_slow_checkout_counts_as_a_failure(clock):
+    breaker = make_breaker(slow_checkout_seconds=1.0)
+
+    for _ in range(4):
+        breaker.record_success(breaker.allow(), checkout_wait=2.0)  # type: ignore[arg-type]
+
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_half_open_after_open_seconds(clock):
+    breaker = make_breaker()
+    trip(breaker)
+
+    clock.now += 9.9
+    assert breaker.state is CircuitState.OPEN
+    clock.now += 0.1
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    first, second = breaker.allow(), breaker.allow()
+    assert first is not None and first.probe
+    assert second is not None and second.probe
+    assert breaker.allow() is None  # probe slots taken
+
+
+def test_successful_probes_close_the_breaker(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 10
+
+    probes = [breaker.allow(), breaker.allow()]
+    breaker.record_success(probes[0])  # type: ignore[arg-type]
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_success(probes[1])  # type: ignore[arg-type]
+
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow() is not None
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 10
+
+    breaker.record_failure(breaker.allow())  # type: ignore[arg-type]
+
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.allow() is None
+
+
+def test_permits_from_an_earlier_period_are_ignored(clock):
+    breaker = make_breaker()
+    stale = [breaker.allow() for _ in range(3)]  # admitted while closed
+    trip(breaker)
+    clock.now += 10
+    probe = breaker.allow()
+
+    # calls that started before the breaker opened finish during half-open
+    for permit in stale:
+        breaker.record_success(permit)  # type: ignore[arg-type]
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_failure(stale[0])  # type: ignore[arg-type]
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    # a probe from the previous half-open period cannot reopen a closed breaker
+    breaker.record_success(probe)  # type: ignore[arg-type]
+    breaker.record_success(breaker.allow())  # type: ignore[arg-type]
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_failure(probe)  # type: ignore[arg-type]
+    assert breaker.state is CircuitState.CLOSED
+
+
+class FakeDriverError(Exception):
+    def __init__(self, pgcode: str | None):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (OperationalError("SELECT 1", {}, FakeDriverError("08006")), True),  # connection_failure
+        (OperationalError("SELECT 1", {}, FakeDriverError("08001")), True),
+        (OperationalError("SELECT 1", {}, FakeDriverError("57P01")), True),  # admin_shutdown
+        (OperationalError("SELECT 1", {}, FakeDriverError("53300")), True),  # too_many_connections
+        (OperationalError("SELECT 1", {}, FakeDriverError("40P01")), False),  # deadlock_detected
+        (OperationalError("SELECT 1", {}, FakeDriverError("57014")), False),  # query_canceled
+        (OperationalError("SELECT 1", {}, FakeDriverError(None)), True),  # libpq, no SQLSTATE
+        (IntegrityError("INSERT", {}, FakeDriverError("23505")), False),
+        (
+            IntegrityError("INSERT", {}, FakeDriverError("23505"), connection_invalidated=True),
+            True,
+        ),
+        (PoolTimeoutError("QueuePool limit reached"), True),
+        (ValueError("not a database error"), False),
+    ],
+)
+def test_is_connectivity_error(error: BaseException, expected: bool):
+    assert is_connectivity_error(error) is expected
@@ -0,0 +1,72 @@
+import uuid
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi.testclient import TestClient
+
+
+def sign_in(client: TestClient) -> dict[str, str]:
+    username = f"etag_{uuid.uuid4().hex[:12]}"
+    client.post("/users/register", json={"username": username, "password": "password-1"})
+    token = client.post(
+        "/auth/token", data={"username": username, "password": "password-1"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_matching_etag_is_304_without_queries_once_cached(client: TestClient):
+    auth = sign_in(client)
+    first = client.get("/users/me", headers=auth)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    again = client.get("/users/me", headers={**auth, "If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+    assert again.headers["x-db-query-count"].startswith("0;")
+
+
+def test_etag_comparison_is_weak_and_accepts_lists_and_star(client: TestClient):
+    auth = sign_in(client)
+    etag = client.get("/users/me", headers=auth).headers["etag"]
+    strong = etag.removeprefix("W/")
+
+    for if_none_match in (strong, f'"other", {etag}', "*"):
+        response = client.get("/users/me", headers={**auth, "If-None-Match": if_none_match})
+        assert response.status_code == 304, if_none_match
+
+    response = client.get("/users/me", headers={**auth, "If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_if_modified_since(client: TestClient):
+    auth = sign_in(client)
+    last_modified = client.get("/users/me", headers=auth).headers["last-modified"]
+    earlier = format_datetime(parsedate_to_datetime(last_modified) - timedelta(seconds=1), usegmt=True)
+
+    def get(**headers: str) -> int:
+        return client.get("/users/me", headers={**auth, **headers}).status_code
+
+    assert get(**{"If-Modified-Since": last_modified}) == 304
+    assert get(**{"If-Modified-Since": earlier}) == 200
+    assert get(**{"If-Modified-Since": "not a date"}) == 200
+    # If-None-Match takes precedence over If-Modified-Since
+    assert get(**{"If-None-Match": '"other"', "If-Modified-Since": last_modified}) == 200
+
+
+def test_changed_user_no_longer_matches(client: TestClient):
+    auth = sign_in(client)
+    etag = client.get("/users/me", headers=auth).headers["etag"]
+
+    changed = client.put(
+        "/users/me/password",
+        json={"old_password": "password-1", "new_password": "password-2"},
+        headers=auth,
+    )
+    assert changed.status_code == 200
+
+    response = client.get("/users/me", headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,99 @@
+from src.services.invalidation import InvalidationBus, LoopbackTransport, UserInvalidation
+
+
+class Recorder:
+    def __init__(self):
+        self.events: list[UserInvalidation] = []
+        self.flushes = 0
+
+    def on_event(self, event: UserInvalidation) -> None:
+        self.events.append(event)
+
+    def on_flush(self) -> None:
+        self.flushes += 1
+
+
+def make_workers(count: int) -> tuple[LoopbackTransport, list[InvalidationBus], list[Recorder]]:
+    transport = LoopbackTransport()
+    buses, recorders = [], []
+    for _ in range(count):
+        bus, recorder = InvalidationBus(transport), Recorder()
+        bus.subscribe(recorder.on_event, recorder.on_flush)
+        bus.start()
+        buses.append(bus)
+        recorders.append(recorder)
+    return transport, buses, recorders
+
+
+def test_publish_reaches_local_and_remote_subscribers():
+    _, (alice, bob), (alice_seen, bob_seen) = make_workers(2)
+
+    event = UserInvalidation("user-1", ("alice",))
+    alice.publish(event)
+
+    assert alice_seen.events == [event]
+    assert bob_seen.events == [event]
+    assert bob_seen.flushes == 0
+
+
+def test_lost_message_flushes_remote_caches():
+    transport, (alice, bob), (_, bob_seen) = make_workers(2)
+
+    alice.publish(UserInvalidation("user-1"))
+    transport.stop()
+    alice.publish(UserInvalidation("user-2"))  # lost
+    bob.start()
+    alice.publish(UserInvalidation("user-3"))
+
+    assert [event.user_id for event in bob_seen.events] == ["user-1"]
+    assert bob_seen.flushes == 1
+
+
+class LossyTransport(LoopbackTransport):
+    """Loopback transport that drops the next ``drop`` payloads."""
+
+    drop = 0
+
+    def publish(self, payload: str) -> None:
+        if self.drop:
+            self.drop -= 1
+            return
+        super().publish(payload)
+
+
+def test_worker_started_late_does_not_flush_for_running_workers():
+    transport, (alice,), _ = make_workers(1)
+    alice.publish(UserInvalidation("user-1"))  # sent before bob listens
+
+    bob, bob_seen = InvalidationBus(transport), Recorder()
+    bob.subscribe(bob_seen.on_event, bob_seen.on_flush)
+    bob.start()
+    alice.publish(UserInvalidation("user-2"))
+
+    assert [event.user_id for event in bob_seen.events] == ["user-2"]
+    assert bob_seen.flushes == 0
+
+
+def test_lost_first_message_from_an_announced_origin_flushes():
+    transport = LossyTransport()
+    bob, bob_seen = InvalidationBus(transport), Recorder()
+    bob.subscribe(bob_seen.on_event, bob_seen.on_flush)
+    bob.start()
+    alice = InvalidationBus(transport)
+    alice.start()  # bob sees the hello
+
+    transport.drop = 1
+    alice.publish(UserInvalidation("user-1"))  # lost
+    alice.publish(UserInvalidation("user-2"))
+
+    assert bob_seen.events == []
+    assert bob_seen.flushes == 1
+
+
+def test_own_messages_echoed_by_the_transport_are_ignored():
+    _, (alice,), (alice_seen,) = make_workers(1)
+
+    alice.publish(UserInvalidation("user-1"))
+
+    assert len(alice_seen.events) == 1
+    assert alice_seen.flushes == 0
@@ -0,0 +1,24 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from src.db import CircuitBreaker, CircuitState, get_database
+
+
+def test_open_breaker_sheds_database_routes_only(client: TestClient, monkeypatch):
+    username = f"shed_{uuid.uuid4().hex[:12]}"
+    password = "shed-password"
+    client.post("/users/register", json={"username": username, "password": password})
+    token = client.post(
+        "/auth/token", data={"username": username, "password": password}
+    ).json()["access_token"]
+
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1)
+    breaker.record_failure(breaker.allow())  # type: ignore[arg-type]
+    assert breaker.state is CircuitState.OPEN
+    monkeypatch.setattr(get_database(), "circuit_breaker", breaker)
+
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 503
+    assert client.get("/.well-known/jwks.json").status_code == 200
+    verified = client.post("/auth/verify", headers={"Authorization": f"Bearer {token}"})
+    assert verified.status_code == 200
@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlmodel import SQLModel
+
+from src.db import DatabaseManager
+from src.db.models import User
+from src.repositories import UserRepository
+from src.services.invalidation import InvalidationBus, LoopbackTransport, UserInvalidation
+from src.services.membership import UsernameIndex
+
+
+def make_repository(tmp_path, usernames: list[str]) -> tuple[DatabaseManager, UserRepository]:
+    db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'membership.db'}")
+    SQLModel.metadata.create_all(db_manager.engine)
+    repository = UserRepository(db_manager, partitioned=False)
+    now = datetime.now(timezone.utc)
+    for username in usernames:
+        repository.create(
+            User(id=uuid.uuid4(), username=username, password_hash="x", created_at=now, updated_at=now)
+        )
+    return db_manager, repository
+
+
+def test_rebuild_scans_outside_the_pool(tmp_path):
+    db_manager, repository = make_repository(tmp_path, ["alice", "bob"])
+    checked_out = []
+
+    usernames = repository.iter_usernames(batch_size=1)
+    for username in usernames:
+        checked_out.append(db_manager.engine.pool.checkedout())
+
+    assert checked_out == [0, 0]
+
+    index = UsernameIndex(repository, min_capacity=100)
+    index.rebuild()
+    assert index.might_contain("alice") and index.might_contain("bob")
+    assert index.stats()["entries"] == 2
+
+
+def test_only_claimed_usernames_are_added(tmp_path):
+    _, repository = make_repository(tmp_path, ["alice"])
+    index = UsernameIndex(repository, min_capacity=100)
+    index.rebuild()
+    bus = InvalidationBus(LoopbackTransport())
+    bus.subscribe(index.on_user_invalidated, index.on_flush)
+
+    bus.publish(UserInvalidation("user-1", ("alice",)))  # password change
+    bus.publish(UserInvalidation("user-1", ("alice",)))  # delete
+    assert index.stats()["entries"] == 1
+
+    bus.publish(UserInvalidation("user-2", ("carol",), claimed=True))
+    assert index.stats()["entries"] == 2
+    assert index.might_contain("carol")
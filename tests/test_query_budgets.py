@@ -0,0 +1,73 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.db import install_query_counter
+from src.middleware import QUERY_BUDGETS, QueryBudgetExceededError, QueryBudgetMiddleware
+
+# Routes whose queries only compile on Postgres; scripts/check_query_budgets.py
+# covers them against a real database.
+POSTGRES_ONLY = {("POST", "/users/batch")}
+
+
+def test_strict_mode_rejects_requests_over_budget():
+    engine = create_engine("sqlite://")
+    install_query_counter(engine)
+    app = FastAPI()
+
+    @app.get("/two-queries")
+    def two_queries():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {}
+
+    within = TestClient(
+        QueryBudgetMiddleware(app, budgets={("GET", "/two-queries"): 2}, strict=True)
+    )
+    assert within.get("/two-queries").status_code == 200
+
+    over = TestClient(
+        QueryBudgetMiddleware(app, budgets={("GET", "/two-queries"): 1}, strict=True)
+    )
+    with pytest.raises(QueryBudgetExceededError):
+        over.get("/two-queries")
+
+
+def test_routes_stay_within_query_budgets(client: TestClient):
+    """Every budgeted route runs in strict mode, which raises on any overrun."""
+    exercised: set[tuple[str, str]] = set()
+
+    def call(method: str, path: str, **kwargs):
+        response = client.request(method, path, **kwargs)
+        assert response.status_code < 500, response.text
+        assert "x-db-query-count" in response.headers
+        exercised.add((method, path))
+        return response
+
+    username = f"budget_{uuid.uuid4().hex[:12]}"
+    password = "budget-check-password"
+    call("POST", "/users/register", json={"username": username, "password": password})
+    token = call(
+        "POST", "/auth/token", data={"username": username, "password": password}
+    ).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    call("POST", "/auth/verify", headers=auth)
+    call("POST", "/auth/refresh", headers=auth)
+    call("GET", "/users/me", headers=auth)
+    call("GET", "/users/available", params={"username": f"free_{uuid.uuid4().hex[:8]}"})
+    call(
+        "PUT",
+        "/users/me/password",
+        headers=auth,
+        json={"old_password": password, "new_password": password + "!"},
+    )
+    call("GET", "/health/ready")
+    call("GET", "/.well-known/jwks.json")
+    call("DELETE", "/users/me", headers=auth)
+
+    assert set(QUERY_BUDGETS) - POSTGRES_ONLY == exercised
@@ -0,0 +1,33 @@
+from src.db import max_workers, worker_pool_size
+from src.server import available_cpus, cpu_quota
+
+
+def test_workers_are_capped_to_keep_a_minimum_pool():
+    # 16 CPUs, postgres transport: username index scan + LISTEN outside the pool
+    workers = min(16, max_workers(20, reserved_per_worker=2, min_pool_size=3))
+
+    assert workers == 4
+    assert worker_pool_size(20, workers, reserved_per_worker=2) == 3
+
+
+def test_max_workers_never_drops_below_one():
+    assert max_workers(2, reserved_per_worker=2, min_pool_size=3) == 1
+
+
+def test_cfs_quota_limits_available_cpus(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+
+    assert cpu_quota(str(tmp_path)) == 1.5
+    assert available_cpus(str(tmp_path)) <= 2
+
+
+def test_unlimited_or_missing_quota(tmp_path):
+    assert cpu_quota(str(tmp_path)) is None
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cpu_quota(str(tmp_path)) is None
+
+    v1 = tmp_path / "v1"
+    (v1 / "cpu").mkdir(parents=True)
+    (v1 / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (v1 / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cpu_quota(str(v1)) == 2.0
@@ -0,0 +1,50 @@
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from scripts.replay_traffic import synthesise
+from src.middleware.traffic_recorder import TrafficRecorderMiddleware
+
+
+class ListRecorder:
+    def __init__(self):
+        self.entries: list[dict[str, Any]] = []
+
+    def sampled(self) -> bool:
+        return True
+
+    def record(self, entry: dict[str, Any]) -> None:
+        self.entries.append(entry)
+
+
+def make_app() -> tuple[FastAPI, ListRecorder]:
+    app = FastAPI()
+
+    @app.get("/users/available")
+    def available(username: str):
+        return {"username": username}
+
+    recorder = ListRecorder()
+    app.add_middleware(TrafficRecorderMiddleware, recorder=recorder)  # type: ignore[arg-type]
+    return app, recorder
+
+
+def test_query_shape_is_recorded_and_replayable():
+    app, recorder = make_app()
+    client = TestClient(app)
+
+    client.get("/users/available", params={"username": "alice-smith"})
+    client.get("/users/available")
+
+    with_query, without_query = recorder.entries
+    assert with_query["query"] == {"username": "str:11"}
+    assert "alice" not in str(with_query)
+    assert without_query["query"] is None
+    assert without_query["status"] == 422
+
+    account = {"username": "replay_user", "password": "replay-password"}
+    params = synthesise(with_query["query"], None, account, with_query["route"])
+    replayed = client.get(with_query["route"], params=params)
+    assert replayed.status_code == 200
+    assert replayed.json()["username"] != account["username"]
@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from src.db import DatabaseManager, get_database
+from src.repositories import UserRepository
+from src.services.invalidation import InvalidationBus, LoopbackTransport, UserInvalidation
+from src.services.status import InternalStatus
+from src.services.user import UserService
+
+
+@pytest.fixture
+def service(tmp_path) -> UserService:
+    db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'users.db'}")
+    SQLModel.metadata.create_all(db_manager.engine)
+    repository = UserRepository(db_manager, partitioned=False)
+    return UserService(repository, InvalidationBus(LoopbackTransport()))
+
+
+def published(service: UserService) -> list[UserInvalidation]:
+    events: list[UserInvalidation] = []
+    service.invalidation_bus.subscribe(events.append, lambda: None)  # type: ignore[union-attr]
+    return events
+
+
+def test_update_with_a_stale_version_is_a_concurrent_modification(service: UserService):
+    user = service.register_user("alice", "password-1").data
+    assert user is not None
+    stale = user.updated_at - timedelta(seconds=1)
+    events = published(service)
+
+    result = service.update_user(str(user.id), expected_updated_at=stale, password_hash="x")
+
+    assert result.status == InternalStatus.CONCURRENT_MODIFICATION
+    assert [event.user_id for event in events] == [str(user.id)]
+    assert service.user_repository.get_by_id(str(user.id)).password_hash == user.password_hash  # type: ignore[union-attr]
+
+    current = service.update_user(
+        str(user.id), username="alice2", expected_updated_at=user.updated_at
+    )
+    assert current.is_success and current.data.username == "alice2"  # type: ignore[union-attr]
+
+
+def test_writes_to_a_missing_user_are_not_found(service: UserService):
+    missing = str(uuid.uuid4())
+
+    assert service.update_user(missing, username="bob").status == InternalStatus.USER_NOT_FOUND
+    assert (
+        service.update_user(missing, expected_updated_at=datetime.now(timezone.utc), username="bob").status
+        == InternalStatus.USER_NOT_FOUND
+    )
+    assert service.reset_password(missing, "password").status == InternalStatus.USER_NOT_FOUND
+    assert service.delete_user(missing).status == InternalStatus.USER_NOT_FOUND
+    assert service.delete_user("not-a-uuid").status == InternalStatus.USER_NOT_FOUND
+
+
+def test_delete_returns_the_deleted_id_and_username(service: UserService):
+    user = service.register_user("carol", "password-1").data
+    assert user is not None
+    repository = service.user_repository
+
+    assert repository.delete(str(user.id), user.updated_at - timedelta(seconds=1)) is None
+    assert repository.delete(str(user.id), user.updated_at) == (user.id, "carol")
+    assert repository.get_by_id(str(user.id)) is None
+
+
+def test_stale_delete_is_a_concurrent_modification(service: UserService):
+    user = service.register_user("dave", "password-1").data
+    assert user is not None
+    events = published(service)
+
+    result = service.delete_user(str(user.id), user.updated_at - timedelta(seconds=1))
+
+    assert result.status == InternalStatus.CONCURRENT_MODIFICATION
+    assert [event.user_id for event in events] == [str(user.id)]
+
+
+def test_change_password_with_a_stale_cached_user(service: UserService):
+    user = service.register_user("erin", "password-1").data
+    assert user is not None
+    # another worker changes the user; this one still holds the old copy
+    assert service.reset_password(str(user.id), "password-2").is_success
+
+    stale = service.change_password(str(user.id), "password-1", "password-3", current_user=user)
+    assert stale.status == InternalStatus.CONCURRENT_MODIFICATION
+
+    fresh = service.change_password(str(user.id), "password-2", "password-3")
+    assert fresh.is_success
+    reloaded = service.user_repository.get_by_id(str(user.id))
+    assert service.verify_password("password-3", reloaded.password_hash)  # type: ignore[union-attr]
+
+
+def test_stale_cached_principal_gets_409_then_recovers(client: TestClient):
+    username = f"stale_{uuid.uuid4().hex[:12]}"
+    client.post("/users/register", json={"username": username, "password": "password-1"})
+    token = client.post(
+        "/auth/token", data={"username": username, "password": "password-1"}
+    ).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    user = client.get("/users/me", headers=auth).json()  # caches the principal
+
+    # a write this worker never heard about
+    UserRepository(get_database(), partitioned=False).update(
+        user["id"], updated_at=datetime.now(timezone.utc) + timedelta(seconds=1)
+    )
+    change = {"old_password": "password-1", "new_password": "password-2"}
+
+    assert client.put("/users/me/password", json=change, headers=auth).status_code == 409
+    # the 409 dropped the cached copy, so a retry sees the current version
+    assert client.put("/users/me/password", json=change, headers=auth).status_code == 200